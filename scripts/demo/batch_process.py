@@ -26,7 +26,7 @@ def parse_args():
                       help='Lista de tickers separados por vírgula (ex: AAPL,MSFT,GOOG)')
     parser.add_argument('--days', type=int, default=30, 
                       help='Número de dias de dados históricos')
-    parser.add_argument('--processor', type=str, default='spark', choices=['spark', 'pandas'],
+    parser.add_argument('--processor', type=str, default='spark', choices=['spark', 'duckdb', 'pandas'],
                       help='Tipo de processador de dados')
     parser.add_argument('--parallel', action='store_true', 
                       help='Processar tickers em paralelo')
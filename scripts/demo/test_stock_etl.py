@@ -34,7 +34,7 @@ def parse_args():
     parser.add_argument('--days', type=int, default=30, help='Número de dias de dados históricos a serem processados')
     parser.add_argument('--mask', action='store_true', help='Ativar mascaramento de dados')
     parser.add_argument('--repository', type=str, default='s3', choices=['s3', 'dynamo'], help='Tipo de repositório')
-    parser.add_argument('--processor', type=str, default='spark', choices=['spark', 'pandas'], 
+    parser.add_argument('--processor', type=str, default='spark', choices=['spark', 'duckdb', 'pandas'], 
                         help='Tipo de processador de dados (spark ou pandas)')
     parser.add_argument('--verbose', action='store_true', help='Ativar logging detalhado')
     parser.add_argument('--tickers', type=str, help='Lista de múltiplos tickers separados por vírgula (ex: AAPL,MSFT,GOOG)')
@@ -200,6 +200,8 @@ def main():
             logger.info("Parando a sessão Spark...")
             try:
                 data_processing_service.spark.stop()
+                # O serviço é compartilhado pela factory: descartá-lo evita entregar a sessão parada
+                factory.reset_data_processing_services()
                 logger.info("Sessão Spark encerrada com sucesso")
             except Exception as e:
                 logger.warning(f"Erro ao encerrar a sessão Spark: {str(e)}")
@@ -10,6 +10,7 @@ pip install -t layers/python/python/lib/python3.11/site-packages `
     yfinance==0.2.18 `
     boto3==1.26.0 `
     requests==2.28.0 `
+    orjson==3.9.10 `
     python-dotenv==0.21.0
 
 # Remover arquivos __pycache__ para reduzir o tamanho
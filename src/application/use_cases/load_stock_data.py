@@ -45,9 +45,10 @@ class LoadStockDataUseCase:
                 }
             )
             
-            # Save to repository
+            # Save to repository; flushed so the data is in storage before the load is reported
             start_time = datetime.now()
             self.market_data_repository.save_data(market_data)
+            self.market_data_repository.flush()
             end_time = datetime.now()
             
             # Log metrics
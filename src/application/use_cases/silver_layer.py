@@ -2,14 +2,24 @@
 import io
 import logging
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import pandas as pd
+import pyarrow.parquet as pq
 import boto3
 
 from src.domain.interfaces.services import ObservabilityService, DataProcessingService
 from src.infrastructure.config.data_lake_settings import DataLakeSettings
 
+# Colunas da bronze usadas pela camada prata (nomes do yfinance e já padronizados); as demais
+# (dividendos, desdobramentos, ...) não são lidas do arquivo. O índice de datas gravado pelo
+# extrator vem junto pelos metadados do pandas
+BRONZE_COLUMNS = frozenset([
+    'timestamp', 'Date', 'Datetime',
+    'Open', 'High', 'Low', 'Close', 'Volume', 'Adj Close',
+    'open', 'high', 'low', 'close', 'volume', 'adjusted_close'
+])
+
 class ProcessToSilverLayerUseCase:
     """Caso de uso para processar dados da camada bronze para prata."""
     
@@ -26,13 +36,14 @@ class ProcessToSilverLayerUseCase:
         self.observability_service = observability_service
         self.s3_client = s3_client or boto3.client('s3')
     
-    def process_stock_data(self, ticker: str, bronze_key: str) -> str:
+    def process_stock_data(self, ticker: str, bronze_key: str, bronze_data: Optional[pd.DataFrame] = None) -> str:
         """
         Processa dados da camada bronze para prata.
         
         Args:
             ticker: Símbolo da ação
             bronze_key: Chave S3 do arquivo na camada bronze
+            bronze_data: Conteúdo de bronze_key já em memória (padrão: lido do S3)
             
         Returns:
             str: Chave S3 onde os dados processados foram salvos
@@ -46,26 +57,19 @@ class ProcessToSilverLayerUseCase:
                 }
             )
             
-            # Ler dados da camada bronze
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=bronze_key)
-            bronze_data = pd.read_parquet(io.BytesIO(response['Body'].read()))
+            # Ler dados da camada bronze, a menos que o chamador já os tenha em memória
+            # (ex.: logo após gravá-los), evitando o GET do arquivo recém-enviado
+            if bronze_data is None:
+                bronze_data = self._read_bronze(bronze_key)
+            else:
+                bronze_data = bronze_data[[c for c in bronze_data.columns if c in BRONZE_COLUMNS]]
             
             # Processar dados
             processed_data = self._clean_and_standardize(bronze_data)
             
             # Calcular indicadores técnicos via serviço de processamento
             # Converter para o formato esperado pelo serviço
-            data_for_processing = []
-            for _, row in processed_data.iterrows():
-                data_for_processing.append({
-                    "timestamp": row['timestamp'].isoformat() if 'timestamp' in processed_data.columns else datetime.now().isoformat(),
-                    "open": float(row['open']) if 'open' in processed_data.columns else None,
-                    "high": float(row['high']) if 'high' in processed_data.columns else None,
-                    "low": float(row['low']) if 'low' in processed_data.columns else None,
-                    "close": float(row['close']) if 'close' in processed_data.columns else None,
-                    "volume": int(row['volume']) if 'volume' in processed_data.columns else None,
-                    "adjusted_close": float(row['adjusted_close']) if 'adjusted_close' in processed_data.columns else None
-                })
+            data_for_processing = self._to_processing_records(processed_data)
             
             # Processar dados
             batch_id = f"{ticker}_{datetime.now().strftime('%Y%m%d')}"
@@ -90,9 +94,15 @@ class ProcessToSilverLayerUseCase:
             filename = f"{ticker}_processed_{now.strftime('%Y%m%d')}.parquet"
             full_key = f"{path}{filename}"
             
-            # Salvar no S3
+            # Salvar no S3 (ZSTD comprime os preços e indicadores bem mais que o snappy padrão,
+            # reduzindo o PUT aqui e o GET da camada ouro; estatísticas por coluna para filtros)
             parquet_buffer = io.BytesIO()
-            processed_data.to_parquet(parquet_buffer)
+            processed_data.to_parquet(
+                parquet_buffer,
+                compression='zstd',
+                compression_level=3,
+                write_statistics=True
+            )
             parquet_buffer.seek(0)
             
             self.s3_client.put_object(
@@ -138,6 +148,58 @@ class ProcessToSilverLayerUseCase:
             )
             raise
     
+    def _read_bronze(self, bronze_key: str) -> pd.DataFrame:
+        """
+        Lê do S3 apenas as colunas da bronze usadas pela camada prata.
+        
+        Args:
+            bronze_key: Chave S3 do arquivo na camada bronze
+            
+        Returns:
+            DataFrame com as colunas de BRONZE_COLUMNS presentes no arquivo
+        """
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=bronze_key)
+        parquet_file = pq.ParquetFile(io.BytesIO(response['Body'].read()))
+        
+        # O esquema vem do rodapé do arquivo; só as colunas conhecidas são decodificadas
+        columns = [name for name in parquet_file.schema_arrow.names if name in BRONZE_COLUMNS]
+        return parquet_file.read(columns=columns, use_pandas_metadata=True).to_pandas()
+    
+    def _to_processing_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Converte o DataFrame nos registros esperados pelo serviço de processamento.
+        
+        Args:
+            df: DataFrame limpo e padronizado
+            
+        Returns:
+            Lista de registros (um por linha), com None nas colunas ausentes
+        """
+        n_rows = len(df)
+        
+        # Colunas convertidas de uma vez para listas Python, sem criar uma Series por linha
+        # como o iterrows; o tipo de cada coluna é resolvido uma vez, não por linha
+        if 'timestamp' in df.columns:
+            timestamps = [timestamp.isoformat() for timestamp in df['timestamp']]
+        else:
+            timestamps = [datetime.now().isoformat()] * n_rows
+        
+        def _column(name, dtype):
+            return df[name].to_numpy(dtype=dtype).tolist() if name in df.columns else [None] * n_rows
+        
+        fields = ("timestamp", "open", "high", "low", "close", "volume", "adjusted_close")
+        columns = (
+            timestamps,
+            _column('open', 'float64'),
+            _column('high', 'float64'),
+            _column('low', 'float64'),
+            _column('close', 'float64'),
+            _column('volume', 'int64'),
+            _column('adjusted_close', 'float64')
+        )
+        
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+    
     def _clean_and_standardize(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Limpa e padroniza dados para a camada prata.
@@ -148,8 +210,12 @@ class ProcessToSilverLayerUseCase:
         Returns:
             DataFrame com dados limpos e padronizados
         """
-        # Criar cópia para não modificar o original
-        df_clean = df.copy()
+        # Criar cópia para não modificar o original; os preços extraídos do yfinance são gravados
+        # com as datas no índice, que vira a coluna timestamp na mesma cópia
+        if 'timestamp' not in df.columns and isinstance(df.index, pd.DatetimeIndex):
+            df_clean = df.reset_index(names='timestamp')
+        else:
+            df_clean = df.copy()
         
         # Padronizar nomes de colunas
         column_mapping = {
@@ -168,9 +234,11 @@ class ProcessToSilverLayerUseCase:
         
         # Lidar com valores ausentes
         numeric_cols = ['open', 'high', 'low', 'close', 'volume', 'adjusted_close']
-        for col in [c for c in numeric_cols if c in df_clean.columns]:
-            # Preencher valores ausentes com método forward fill (último valor válido)
-            df_clean[col] = df_clean[col].fillna(method='ffill')
+        present_cols = [c for c in numeric_cols if c in df_clean.columns]
+        if present_cols:
+            # Preencher valores ausentes com método forward fill (último valor válido),
+            # todas as colunas numéricas em uma única operação
+            df_clean[present_cols] = df_clean[present_cols].ffill()
         
         # Remover duplicatas
         df_clean = df_clean.drop_duplicates()
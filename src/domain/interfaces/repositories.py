@@ -29,6 +29,10 @@ class StockRepository(ABC):
     def get_prices(self, ticker: str, start_date: datetime, end_date: datetime) -> List[StockPrice]:
         """Get historical prices for a stock within a date range."""
         pass
+    
+    def get_prices_bulk(self, tickers: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[StockPrice]]:
+        """Get historical prices for several stocks within a date range."""
+        return {ticker: self.get_prices(ticker, start_date, end_date) for ticker in tickers}
 
 
 class MarketDataRepository(ABC):
@@ -43,6 +47,10 @@ class MarketDataRepository(ABC):
     def get_data(self, source_id: str, data_type: str, start_date: datetime, end_date: datetime) -> List[MarketData]:
         """Get market data from a specific source within a date range."""
         pass
+    
+    def flush(self) -> None:
+        """Write any buffered market data to storage."""
+        pass
 
 
 class ObservabilityService(ABC):
@@ -65,6 +73,10 @@ class ObservabilityService(ABC):
     def end_trace(self, trace_id: str, success: bool = True, result_data: Dict[str, Any] = None) -> None:
         """End a trace with the given trace ID."""
         pass
+    
+    def flush(self) -> None:
+        """Send any buffered events and metrics."""
+        pass
 
 
 class DataMaskingService(ABC):
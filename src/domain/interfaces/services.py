@@ -5,6 +5,11 @@ from typing import List, Dict, Any, Optional
 from src.domain.entities.stock import StockPrice
 
 
+# Indicators are returned column-wise: aligned lists sharing a single 'timestamp' column,
+# e.g. {'timestamp': [...], 'value': [...]} or {'timestamp': [...], 'upper': [...], 'middle': [...], 'lower': [...]}
+IndicatorSeries = Dict[str, List[Any]]
+
+
 class MarketDataService(ABC):
     @abstractmethod
     def get_historical_data(self, symbol, start_date, end_date):
@@ -30,7 +35,7 @@ class DataProcessingService(ABC):
     
     @abstractmethod
     def process_batch_data(self, batch_id: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Process a batch of data."""
+        """Process a batch of data (indicators are returned as IndicatorSeries)."""
         pass
     
     @abstractmethod
@@ -30,7 +30,10 @@ class YahooFinanceAdapter(FinancialDataService):
             cached_data = self.cache.get(cache_key)
             if cached_data:
                 self.logger.info(f"Using cached data for {ticker} from {start_date} to {end_date}")
-                return cached_data
+                return [
+                    StockPrice(**{**item, 'timestamp': datetime.fromisoformat(item['timestamp'])})
+                    for item in cached_data
+                ]
             
             self.logger.info(f"Fetching historical data for {ticker} from {start_date} to {end_date}")
             
@@ -8,10 +8,32 @@ class DataLakeSettings:
     SILVER_PREFIX = "silver/"  # Dados processados
     GOLD_PREFIX = "gold/"     # Dados analíticos
     
+    @staticmethod
+    def get_day_partition(date):
+        """Obter o sufixo da partição diária (year=/month=/day=/) da camada bronze."""
+        return f"year={date.year}/month={date.month:02d}/day={date.day:02d}/"
+    
     @staticmethod
     def get_bronze_path(ticker, data_type, date):
         """Obter caminho para dados na camada bronze."""
-        return f"{DataLakeSettings.BRONZE_PREFIX}stocks/{ticker}/{data_type}/year={date.year}/month={date.month:02d}/day={date.day:02d}/"
+        return DataLakeSettings.get_bronze_partition_path(ticker, data_type, DataLakeSettings.get_day_partition(date))
+    
+    @staticmethod
+    def get_bronze_partition_path(ticker, data_type, day_partition):
+        """Obter caminho na camada bronze a partir do sufixo da partição já formatado."""
+        return f"{DataLakeSettings.BRONZE_PREFIX}stocks/{ticker}/{data_type}/{day_partition}"
+    
+    @staticmethod
+    def get_bronze_daily_key(ticker, date):
+        """Obter a chave do arquivo de preços diários na camada bronze (um por ticker e dia)."""
+        return DataLakeSettings.get_bronze_daily_key_from_parts(
+            DataLakeSettings.get_bronze_path(ticker, 'prices', date), ticker, date.strftime('%Y-%m-%d')
+        )
+    
+    @staticmethod
+    def get_bronze_daily_key_from_parts(bronze_path, ticker, day_label):
+        """Obter a chave do arquivo de preços diários a partir do caminho do dia e da data (YYYY-MM-DD) já formatados."""
+        return f"{bronze_path}{ticker}_daily_{day_label}.parquet"
     
     @staticmethod
     def get_silver_path(ticker, data_type, date):
@@ -20,6 +20,9 @@ class Settings:
     ALPHA_VANTAGE_API_KEY_PARAM = os.getenv("ALPHA_VANTAGE_API_KEY_PARAM", "/financial-market/alphavantage/api-key")
     ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")
     
+    # Spark (registros por lote Arrow: ~4096 linhas de 7 colunas numéricas cabem no cache L2)
+    SPARK_ARROW_MAX_RECORDS_PER_BATCH = int(os.getenv("SPARK_ARROW_MAX_RECORDS_PER_BATCH", "4096"))
+    
     # Ambiente
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import decimal
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
@@ -224,51 +225,7 @@ class DynamoDBStockRepository(StockRepository):
     def get_prices(self, ticker: str, start_date: datetime, end_date: datetime) -> List[StockPrice]:
         """Get historical prices for a stock from DynamoDB."""
         try:
-            # Convert dates to ISO format for string comparison
-            start_iso = start_date.isoformat()
-            end_iso = end_date.isoformat()
-            
-            # Query using GSI for ticker and timestamp range
-            response = self.prices_table.query(
-                KeyConditionExpression=Key('ticker').eq(ticker) & 
-                                      Key('timestamp').between(start_iso, end_iso)
-            )
-            
-            prices = []
-            for item in response.get('Items', []):
-                price = StockPrice(
-                    timestamp=datetime.fromisoformat(item["timestamp"]),
-                    open=float(item["open"]),
-                    high=float(item["high"]),
-                    low=float(item["low"]),
-                    close=float(item["close"]),
-                    volume=item["volume"],
-                    adjusted_close=float(item["adjusted_close"]) if "adjusted_close" in item else None
-                )
-                prices.append(price)
-            
-            # Handle pagination
-            while 'LastEvaluatedKey' in response:
-                response = self.prices_table.query(
-                    KeyConditionExpression=Key('ticker').eq(ticker) & 
-                                          Key('timestamp').between(start_iso, end_iso),
-                    ExclusiveStartKey=response['LastEvaluatedKey']
-                )
-                
-                for item in response.get('Items', []):
-                    price = StockPrice(
-                        timestamp=datetime.fromisoformat(item["timestamp"]),
-                        open=float(item["open"]),
-                        high=float(item["high"]),
-                        low=float(item["low"]),
-                        close=float(item["close"]),
-                        volume=item["volume"],
-                        adjusted_close=float(item["adjusted_close"]) if "adjusted_close" in item else None
-                    )
-                    prices.append(price)
-            
-            # Sort by timestamp
-            prices.sort(key=lambda p: p.timestamp)
+            prices = self._query_prices(ticker, start_date, end_date)
             
             self.logger.info(f"Retrieved {len(prices)} price points for {ticker} from DynamoDB")
             return prices
@@ -276,3 +233,64 @@ class DynamoDBStockRepository(StockRepository):
         except Exception as e:
             self.logger.error(f"Error getting prices for {ticker} from DynamoDB: {str(e)}")
             raise
+    
+    def get_prices_bulk(self, tickers: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[StockPrice]]:
+        """Get historical prices for several stocks from DynamoDB, one parallel query per ticker."""
+        if not tickers:
+            return {}
+        
+        try:
+            # Resolve the table before fanning out; the lazy property is not thread-safe
+            self.prices_table
+            
+            with ThreadPoolExecutor(max_workers=min(50, len(tickers))) as executor:
+                futures = {
+                    ticker: executor.submit(self._query_prices, ticker, start_date, end_date)
+                    for ticker in tickers
+                }
+                results = {ticker: future.result() for ticker, future in futures.items()}
+            
+            total = sum(len(prices) for prices in results.values())
+            self.logger.info(f"Retrieved {total} price points for {len(tickers)} tickers from DynamoDB")
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error getting prices for {len(tickers)} tickers from DynamoDB: {str(e)}")
+            raise
+    
+    def _query_prices(self, ticker: str, start_date: datetime, end_date: datetime) -> List[StockPrice]:
+        """Query all pages of prices for a ticker within a date range."""
+        # Convert dates to ISO format for string comparison
+        start_iso = start_date.isoformat()
+        end_iso = end_date.isoformat()
+        
+        # The client paginator follows LastEvaluatedKey and, unlike the Table resource, is thread-safe
+        paginator = self.prices_table.meta.client.get_paginator('query')
+        pages = paginator.paginate(
+            TableName=self.prices_table_name,
+            KeyConditionExpression=Key('ticker').eq(ticker) & 
+                                  Key('timestamp').between(start_iso, end_iso),
+            PaginationConfig={'PageSize': 1000}
+        )
+        
+        item_to_price = self._item_to_price
+        prices = [item_to_price(item) for page in pages for item in page.get('Items', [])]
+        
+        # Sort by timestamp
+        prices.sort(key=lambda p: p.timestamp)
+        
+        return prices
+    
+    @staticmethod
+    def _item_to_price(item: Dict[str, Any]) -> StockPrice:
+        """Convert a prices table item to a StockPrice."""
+        adjusted_close = item.get("adjusted_close")
+        return StockPrice(
+            datetime.fromisoformat(item["timestamp"]),
+            float(item["open"]),
+            float(item["high"]),
+            float(item["low"]),
+            float(item["close"]),
+            int(item["volume"]),
+            float(adjusted_close) if adjusted_close is not None else None
+        )
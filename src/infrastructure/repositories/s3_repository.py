@@ -1,12 +1,24 @@
 # src/infrastructure/repositories/s3_repository.py
-import json
+import decimal
+import heapq
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 import io
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
 
 from src.domain.entities.stock import Stock, StockPrice
 from src.domain.entities.market_data import MarketData
@@ -14,13 +26,50 @@ from src.domain.interfaces.repositories import StockRepository, MarketDataReposi
 from src.infrastructure.config.settings import Settings
 
 
+def _json_default(obj: Any) -> Any:
+    """Serialize values orjson does not support natively."""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Schema of the price Parquet files
+PRICE_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.int64()),
+    ("adjusted_close", pa.float64())
+])
+PRICE_COLUMNS = PRICE_SCHEMA.names
+
+# Schema of the daily market data rollups (payloads are stored as JSON strings)
+MARKET_DATA_SCHEMA = pa.schema([
+    ("source_id", pa.string()),
+    ("data_type", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+    ("data", pa.string()),
+    ("metadata", pa.string())
+])
+
+# Multipart settings for Parquet uploads
+PARQUET_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    use_threads=True
+)
+
+
 class S3StockRepository(StockRepository):
     """Implementation of StockRepository using S3."""
     
-    def __init__(self, settings: Settings, s3_client=None):
+    def __init__(self, settings: Settings, s3_client=None, filesystem=None):
         self.settings = settings
         self.logger = logging.getLogger(__name__)
         self.s3_client = s3_client or boto3.client('s3', region_name=settings.AWS_REGION)
+        self.filesystem = filesystem or fs.S3FileSystem(region=settings.AWS_REGION)
         self.bucket_name = settings.S3_DATA_BUCKET
     
     def save_stock(self, stock: Stock) -> None:
@@ -42,7 +91,7 @@ class S3StockRepository(StockRepository):
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=key,
-                Body=json.dumps(stock_dict, indent=2),
+                Body=orjson.dumps(stock_dict, default=_json_default),
                 ContentType="application/json"
             )
             
@@ -60,7 +109,7 @@ class S3StockRepository(StockRepository):
             try:
                 # Try to get object from S3
                 response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
-                stock_dict = json.loads(response['Body'].read().decode('utf-8'))
+                stock_dict = orjson.loads(response['Body'].read())
                 
                 # Create Stock entity
                 stock = Stock(
@@ -88,37 +137,51 @@ class S3StockRepository(StockRepository):
                 self.logger.warning(f"No prices to save for {ticker}")
                 return
             
-            # Convert to DataFrame for Parquet serialization
-            data = []
-            for price in prices:
-                data.append({
-                    "timestamp": price.timestamp,
-                    "open": price.open,
-                    "high": price.high,
-                    "low": price.low,
-                    "close": price.close,
-                    "volume": price.volume,
-                    "adjusted_close": price.adjusted_close
-                })
-            
-            df = pd.DataFrame(data)
+            # Build the Arrow table column by column for Parquet serialization
+            # (timestamps are stored timezone-naive)
+            table = pa.Table.from_pydict(
+                {
+                    "timestamp": [p.timestamp.replace(tzinfo=None) for p in prices],
+                    "open": [p.open for p in prices],
+                    "high": [p.high for p in prices],
+                    "low": [p.low for p in prices],
+                    "close": [p.close for p in prices],
+                    "volume": [p.volume for p in prices],
+                    "adjusted_close": [p.adjusted_close for p in prices]
+                },
+                schema=PRICE_SCHEMA
+            )
             
-            # Determine time range for file naming
-            min_date = min(prices, key=lambda p: p.timestamp).timestamp.date()
-            max_date = max(prices, key=lambda p: p.timestamp).timestamp.date()
+            # Determine time range for file naming (single pass over the timestamp column)
+            time_range = pc.min_max(table["timestamp"]).as_py()
+            min_date = time_range["min"].date()
+            max_date = time_range["max"].date()
             
             # Create key with partitioning
             key = f"stocks/{ticker}/prices/year={min_date.year}/month={min_date.month:02d}/prices_{min_date}_{max_date}.parquet"
             
-            # Convert DataFrame to Parquet and save to S3
+            # Convert to Parquet (ZSTD, dictionary pages and column statistics
+            # so readers can push predicates down) and save to S3
             buffer = io.BytesIO()
-            df.to_parquet(buffer, index=False)
+            pq.write_table(
+                table,
+                buffer,
+                compression='zstd',
+                compression_level=3,
+                use_dictionary=True,
+                write_statistics=True,
+                row_group_size=50_000,
+                data_page_size=1 << 20
+            )
             buffer.seek(0)
             
-            self.s3_client.put_object(
+            # Stream the buffer (multipart above 8 MiB) instead of copying it with getvalue()
+            self.s3_client.upload_fileobj(
+                Fileobj=buffer,
                 Bucket=self.bucket_name,
                 Key=key,
-                Body=buffer.getvalue()
+                ExtraArgs={'ContentType': 'application/octet-stream'},
+                Config=PARQUET_TRANSFER_CONFIG
             )
             
             self.logger.info(f"Saved {len(prices)} price points for {ticker} to S3 from {min_date} to {max_date}")
@@ -130,70 +193,60 @@ class S3StockRepository(StockRepository):
     def get_prices(self, ticker: str, start_date: datetime, end_date: datetime) -> List[StockPrice]:
         """Get historical prices for a stock from S3."""
         try:
-            # List all price files for the stock in the date range
-            start_year = start_date.year
-            end_year = end_date.year
-            
-            all_prices = []
-            
-            for year in range(start_year, end_year + 1):
-                # Calculate month range for this year
-                start_month = 1 if year > start_year else start_date.month
-                end_month = 12 if year < end_year else end_date.month
-                
-                for month in range(start_month, end_month + 1):
-                    prefix = f"stocks/{ticker}/prices/year={year}/month={month:02d}/"
-                    
-                    # List files in this partition
-                    response = self.s3_client.list_objects_v2(
-                        Bucket=self.bucket_name,
-                        Prefix=prefix
-                    )
-                    
-                    if 'Contents' not in response:
-                        continue
-                    
-                    # Process each file
-                    for obj in response['Contents']:
-                        file_key = obj['Key']
-                        
-                        # Get file content
-                        file_response = self.s3_client.get_object(
-                            Bucket=self.bucket_name,
-                            Key=file_key
-                        )
-                        
-                        # Read Parquet file into DataFrame
-                        buffer = io.BytesIO(file_response['Body'].read())
-                        df = pd.read_parquet(buffer)
-                        
-                        # Normalize timezone information
-                        if 'timestamp' in df.columns:
-                            # Convert datetime64 with timezone to timezone-naive datetime
-                            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
-                        
-                        # Ensure start_date and end_date are timezone-naive
-                        naive_start_date = start_date.replace(tzinfo=None)
-                        naive_end_date = end_date.replace(tzinfo=None)
-                        
-                        # Filter by date range
-                        df = df[(df['timestamp'] >= naive_start_date) & (df['timestamp'] <= naive_end_date)]
-                        
-                        # Convert to StockPrice entities
-                        for _, row in df.iterrows():
-                            price = StockPrice(
-                                timestamp=row['timestamp'],
-                                open=row['open'],
-                                high=row['high'],
-                                low=row['low'],
-                                close=row['close'],
-                                volume=row['volume'],
-                                adjusted_close=row['adjusted_close']
-                            )
-                            all_prices.append(price)
+            # Only scan the year=/month= partitions that overlap the date range
+            partition_filter = (
+                ((ds.field("year") > start_date.year) |
+                 ((ds.field("year") == start_date.year) & (ds.field("month") >= start_date.month))) &
+                ((ds.field("year") < end_date.year) |
+                 ((ds.field("year") == end_date.year) & (ds.field("month") <= end_date.month)))
+            )
             
-            # Sort by timestamp
-            all_prices.sort(key=lambda p: p.timestamp)
+            try:
+                dataset = ds.dataset(
+                    f"{self.bucket_name}/stocks/{ticker}/prices/",
+                    format="parquet",
+                    partitioning="hive",
+                    filesystem=self.filesystem
+                )
+            except FileNotFoundError:
+                # No prices stored for this stock yet
+                self.logger.info(f"Retrieved 0 price points for {ticker} from {start_date} to {end_date}")
+                return []
+            
+            df = dataset.to_table(columns=PRICE_COLUMNS, filter=partition_filter).to_pandas()
+            
+            # Convert datetime64 with timezone to timezone-naive datetime
+            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
+            
+            # Ensure start_date and end_date are timezone-naive
+            naive_start_date = start_date.replace(tzinfo=None)
+            naive_end_date = end_date.replace(tzinfo=None)
+            
+            # Filter by date range and order chronologically before building objects
+            df = df[(df['timestamp'] >= naive_start_date) & (df['timestamp'] <= naive_end_date)]
+            df = df.sort_values('timestamp', kind='stable')
+            
+            # Convert to StockPrice entities straight from the columns
+            all_prices = [
+                StockPrice(
+                    timestamp=timestamp,
+                    open=open_,
+                    high=high,
+                    low=low,
+                    close=close,
+                    volume=volume,
+                    adjusted_close=adjusted_close
+                )
+                for timestamp, open_, high, low, close, volume, adjusted_close in zip(
+                    df['timestamp'].tolist(),
+                    df['open'].tolist(),
+                    df['high'].tolist(),
+                    df['low'].tolist(),
+                    df['close'].tolist(),
+                    df['volume'].tolist(),
+                    df['adjusted_close'].tolist()
+                )
+            ]
             
             self.logger.info(f"Retrieved {len(all_prices)} price points for {ticker} from {start_date} to {end_date}")
             return all_prices
@@ -206,94 +259,135 @@ class S3StockRepository(StockRepository):
 class S3MarketDataRepository(MarketDataRepository):
     """Implementation of MarketDataRepository using S3."""
     
-    def __init__(self, settings: Settings, s3_client=None):
+    def __init__(self, settings: Settings, s3_client=None, filesystem=None,
+                 max_buffered_records: int = 1000, max_buffer_age_seconds: int = 300):
         self.settings = settings
         self.logger = logging.getLogger(__name__)
         self.s3_client = s3_client or boto3.client('s3')
+        self.filesystem = filesystem or fs.S3FileSystem(region=settings.AWS_REGION)
         self.bucket_name = settings.S3_DATA_BUCKET
+        
+        # Records are buffered per (source_id, data_type, day) and written as one
+        # Parquet rollup per group instead of one small JSON object per record.
+        # Nothing is written at interpreter exit (a frozen Lambda never gets there):
+        # callers must flush() before reporting the data as saved
+        self.max_buffered_records = max_buffered_records
+        self.max_buffer_age_seconds = max_buffer_age_seconds
+        self._buffer: Dict[Tuple[str, str, date], List[Dict[str, Any]]] = {}
+        self._buffered_records = 0
+        self._buffer_started_at = None
+        self._buffer_lock = threading.Lock()
     
     def save_data(self, data: MarketData) -> None:
-        """Save market data to S3."""
+        """Buffer market data to be written to S3 with the next rollup (see flush)."""
         try:
-            # Create a partition structure
-            timestamp = data.timestamp
-            key = f"market_data/{data.source_id}/{data.data_type}/year={timestamp.year}/month={timestamp.month:02d}/day={timestamp.day:02d}/{timestamp.timestamp()}.json"
-            
-            # Convert to dict for JSON serialization
-            data_dict = {
+            timestamp = data.timestamp.replace(tzinfo=None)
+            record = {
                 "source_id": data.source_id,
                 "data_type": data.data_type,
-                "timestamp": data.timestamp.isoformat(),
-                "data": data.data,
-                "metadata": data.metadata
+                "timestamp": timestamp,
+                "data": orjson.dumps(data.data, default=_json_default).decode('utf-8'),
+                "metadata": orjson.dumps(data.metadata, default=_json_default).decode('utf-8') if data.metadata is not None else None
             }
             
-            # Save to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=json.dumps(data_dict, indent=2),
-                ContentType="application/json"
-            )
+            with self._buffer_lock:
+                group = (data.source_id, data.data_type, timestamp.date())
+                self._buffer.setdefault(group, []).append(record)
+                self._buffered_records += 1
+                if self._buffer_started_at is None:
+                    self._buffer_started_at = time.monotonic()
+                
+                should_flush = (
+                    self._buffered_records >= self.max_buffered_records or
+                    time.monotonic() - self._buffer_started_at >= self.max_buffer_age_seconds
+                )
             
-            self.logger.info(f"Saved market data from {data.source_id} of type {data.data_type} to S3")
+            self.logger.debug(f"Buffered market data from {data.source_id} of type {data.data_type}")
+            
+            if should_flush:
+                self.flush()
             
         except Exception as e:
             self.logger.error(f"Error saving market data to S3: {str(e)}")
             raise
     
-    def get_data(self, source_id: str, data_type: str, start_date: datetime, end_date: datetime) -> List[MarketData]:
-        """Get market data from S3 within a date range."""
-        try:
-            all_data = []
-            
-            # List all days in the date range
-            current_date = start_date.date()
-            end_date_day = end_date.date()
+    def flush(self) -> None:
+        """Write buffered market data to S3, one Parquet rollup per source, type and day."""
+        with self._buffer_lock:
+            buffer = self._buffer
+            self._buffer = {}
+            self._buffered_records = 0
+            self._buffer_started_at = None
+        
+        pending = list(buffer.items())
+        while pending:
+            (source_id, data_type, day), records = pending[0]
+            key = (
+                f"market_data/{source_id}/{data_type}/year={day.year}/month={day.month:02d}/day={day.day:02d}/"
+                f"rollup-{uuid.uuid4().hex}.parquet"
+            )
             
-            while current_date <= end_date_day:
-                # Create prefix for this day
-                prefix = f"market_data/{source_id}/{data_type}/year={current_date.year}/month={current_date.month:02d}/day={current_date.day:02d}/"
+            try:
+                table = pa.Table.from_pylist(records, schema=MARKET_DATA_SCHEMA)
                 
-                # List files in this partition
-                response = self.s3_client.list_objects_v2(
+                buffer_file = io.BytesIO()
+                pq.write_table(table, buffer_file, compression='zstd', write_statistics=True)
+                buffer_file.seek(0)
+                
+                self.s3_client.upload_fileobj(
+                    Fileobj=buffer_file,
                     Bucket=self.bucket_name,
-                    Prefix=prefix
+                    Key=key,
+                    ExtraArgs={'ContentType': 'application/octet-stream'},
+                    Config=PARQUET_TRANSFER_CONFIG
                 )
                 
-                if 'Contents' in response:
-                    # Process each file
-                    for obj in response['Contents']:
-                        file_key = obj['Key']
-                        
-                        # Get file content
-                        file_response = self.s3_client.get_object(
-                            Bucket=self.bucket_name,
-                            Key=file_key
-                        )
-                        
-                        # Parse JSON
-                        data_dict = json.loads(file_response['Body'].read().decode('utf-8'))
-                        
-                        # Create MarketData entity
-                        timestamp = datetime.fromisoformat(data_dict["timestamp"])
-                        
-                        # Filter by exact time range
-                        if start_date <= timestamp <= end_date:
-                            market_data = MarketData(
-                                source_id=data_dict["source_id"],
-                                data_type=data_dict["data_type"],
-                                timestamp=timestamp,
-                                data=data_dict["data"],
-                                metadata=data_dict.get("metadata")
-                            )
-                            all_data.append(market_data)
+                self.logger.info(f"Saved {len(records)} market data items from {source_id} of type {data_type} to S3 for {day}")
+                pending.pop(0)
+                
+            except Exception as e:
+                # Put the unsaved groups back so the next flush retries them
+                with self._buffer_lock:
+                    for group, group_records in pending:
+                        self._buffer.setdefault(group, [])[:0] = group_records
+                        self._buffered_records += len(group_records)
+                    if self._buffer_started_at is None:
+                        self._buffer_started_at = time.monotonic()
                 
-                # Move to next day
-                current_date = current_date.replace(day=current_date.day + 1)
+                self.logger.error(f"Error saving market data rollup to S3: {str(e)}")
+                raise
+    
+    def get_data(self, source_id: str, data_type: str, start_date: datetime, end_date: datetime) -> List[MarketData]:
+        """Get market data from S3 within a date range."""
+        try:
+            # Make buffered records visible to the read
+            self.flush()
             
-            # Sort by timestamp
+            all_data = []
+            parquet_paths = []
+            
+            # List all days in the date range up front and read their partitions concurrently
+            first_day = start_date.date()
+            days = [first_day + timedelta(days=i) for i in range((end_date.date() - first_day).days + 1)]
+            
+            if days:
+                with ThreadPoolExecutor(max_workers=min(16, len(days))) as executor:
+                    day_results = executor.map(
+                        lambda day: self._read_day(source_id, data_type, day, start_date, end_date),
+                        days
+                    )
+                    for day_data, day_parquet_paths in day_results:
+                        all_data.extend(day_data)
+                        parquet_paths.extend(day_parquet_paths)
+            
+            # Merge the (few) JSON records with the rollups, which come back already sorted
             all_data.sort(key=lambda d: d.timestamp)
+            if parquet_paths:
+                all_data = list(heapq.merge(
+                    all_data,
+                    self._read_rollups(parquet_paths, start_date, end_date),
+                    key=lambda d: d.timestamp
+                ))
             
             self.logger.info(f"Retrieved {len(all_data)} market data items from {source_id} of type {data_type} from {start_date} to {end_date}")
             return all_data
@@ -301,6 +395,74 @@ class S3MarketDataRepository(MarketDataRepository):
         except Exception as e:
             self.logger.error(f"Error getting market data from S3: {str(e)}")
             raise
+    
+    def _read_day(self, source_id: str, data_type: str, day: date,
+                  start_date: datetime, end_date: datetime) -> Tuple[List[MarketData], List[str]]:
+        """Read the JSON records of one day partition and list its Parquet rollups."""
+        day_data = []
+        parquet_paths = []
+        
+        # Bind the client methods and bucket once for the per-file loop
+        get_object = self.s3_client.get_object
+        bucket = self.bucket_name
+        
+        # Create prefix for this day
+        prefix = f"market_data/{source_id}/{data_type}/year={day.year}/month={day.month:02d}/day={day.day:02d}/"
+        
+        # List files in this partition; paginated, since one record per file
+        # easily exceeds the 1000 keys returned by a single call
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=bucket, Prefix=prefix, PaginationConfig={'PageSize': 1000})
+        
+        for obj in (obj for page in pages for obj in page.get('Contents', [])):
+            file_key = obj['Key']
+            
+            # Daily rollups are scanned together by _read_rollups
+            if file_key.endswith('.parquet'):
+                parquet_paths.append(f"{bucket}/{file_key}")
+                continue
+            
+            # Get file content (records written one JSON file each)
+            file_response = get_object(Bucket=bucket, Key=file_key)
+            
+            # Parse JSON
+            data_dict = orjson.loads(file_response['Body'].read())
+            
+            # Create MarketData entity
+            timestamp = datetime.fromisoformat(data_dict["timestamp"])
+            
+            # Filter by exact time range
+            if start_date <= timestamp <= end_date:
+                day_data.append(MarketData(
+                    source_id=data_dict["source_id"],
+                    data_type=data_dict["data_type"],
+                    timestamp=timestamp,
+                    data=data_dict["data"],
+                    metadata=data_dict.get("metadata")
+                ))
+        
+        return day_data, parquet_paths
+    
+    def _read_rollups(self, paths: List[str], start_date: datetime, end_date: datetime) -> List[MarketData]:
+        """Scan Parquet rollups as one dataset, pushing the time range down to the files, in time order."""
+        dataset = ds.dataset(paths, schema=MARKET_DATA_SCHEMA, format="parquet", filesystem=self.filesystem)
+        timestamp_field = ds.field("timestamp")
+        table = dataset.to_table(
+            filter=(timestamp_field >= start_date.replace(tzinfo=None)) & (timestamp_field <= end_date.replace(tzinfo=None))
+        ).sort_by("timestamp")
+        
+        return [
+            MarketData(
+                source_id=source_id,
+                data_type=data_type,
+                timestamp=timestamp,
+                data=orjson.loads(data),
+                metadata=orjson.loads(metadata) if metadata is not None else None
+            )
+            for source_id, data_type, timestamp, data, metadata in zip(
+                *(table.column(name).to_pylist() for name in MARKET_DATA_SCHEMA.names)
+            )
+        ]
 
 
 # src/infrastructure/repositories/dynamo_repository.py
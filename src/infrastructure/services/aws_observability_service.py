@@ -1,12 +1,16 @@
 # src/infrastructure/services/aws_observability_service.py
-import json
+import atexit
 import logging
+import queue
+import threading
 import time
 import uuid
-from datetime import datetime
-from typing import Dict, Any, Optional
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 import boto3
+import orjson
 
 from src.domain.interfaces.repositories import ObservabilityService
 from src.infrastructure.config.settings import Settings
@@ -15,26 +19,72 @@ from src.infrastructure.config.settings import Settings
 class AWSObservabilityService(ObservabilityService):
     """Implementation of ObservabilityService using AWS CloudWatch."""
     
-    def __init__(self, settings: Settings, cloudwatch_client=None, logs_client=None):
+    # CloudWatch limits for a single put_log_events / put_metric_data call
+    MAX_LOG_EVENTS_PER_CALL = 10000
+    MAX_LOG_BYTES_PER_CALL = 1048576
+    LOG_EVENT_OVERHEAD_BYTES = 26
+    MAX_METRICS_PER_CALL = 1000
+    
+    # Log groups and streams known to exist, shared by every instance in the process
+    # so warm Lambda containers do not recreate them on each invocation
+    _known_log_groups: Set[str] = set()
+    _known_streams: Set[Tuple[str, str]] = set()
+    
+    # A single background flusher serves every instance in the process; instances are
+    # tracked weakly so a discarded service is not kept alive by the flusher
+    _instances: "weakref.WeakSet[AWSObservabilityService]" = weakref.WeakSet()
+    _flusher_lock = threading.Lock()
+    _flusher_thread: Optional[threading.Thread] = None
+    
+    def __init__(self, settings: Settings, cloudwatch_client=None, logs_client=None, flush_interval_ms: int = 1000):
         self.settings = settings
         self.logger = logging.getLogger(__name__)
         self.cloudwatch_client = cloudwatch_client or boto3.client('cloudwatch', region_name=settings.AWS_REGION)
         self.logs_client = logs_client or boto3.client('logs', region_name=settings.AWS_REGION)
         self.service_name = settings.PROJECT_NAME
         self.environment = settings.ENVIRONMENT
+        self.log_group_name = f"/aws/lambda/{self.service_name}-{self.environment}"
+        
+        # Events and metrics are buffered and sent to CloudWatch in batches
+        self.flush_interval = flush_interval_ms / 1000
+        self._log_queue = queue.Queue()
+        self._metric_queue = queue.Queue()
+        self._flush_lock = threading.Lock()
         
-        # Ensure log group exists
-        self._ensure_log_group_exists()
+        # In development mode nothing is sent to CloudWatch, so there is nothing to flush.
+        # The background flush is best effort: a frozen Lambda container does not run it,
+        # so handlers call flush() before returning
+        if self.environment != "development":
+            self._register_for_periodic_flush(self)
     
     def _ensure_log_group_exists(self):
         """Ensure CloudWatch Logs log group exists."""
-        log_group_name = f"/aws/lambda/{self.service_name}-{self.environment}"
+        if self.log_group_name in self._known_log_groups:
+            return
+        
         try:
-            self.logs_client.create_log_group(logGroupName=log_group_name)
-            self.logger.info(f"Created log group: {log_group_name}")
-        except Exception as e:
-            # Ignore ResourceAlreadyExistsException
-            self.logger.debug(f"Log group may already exist: {log_group_name} - {str(e)}")
+            self.logs_client.create_log_group(logGroupName=self.log_group_name)
+            self.logger.info(f"Created log group: {self.log_group_name}")
+        except self.logs_client.exceptions.ResourceAlreadyExistsException:
+            self.logger.debug(f"Log group already exists: {self.log_group_name}")
+        
+        self._known_log_groups.add(self.log_group_name)
+    
+    def _ensure_log_stream_exists(self, log_stream_name: str):
+        """Ensure CloudWatch Logs log stream exists."""
+        key = (self.log_group_name, log_stream_name)
+        if key in self._known_streams:
+            return
+        
+        try:
+            self.logs_client.create_log_stream(
+                logGroupName=self.log_group_name,
+                logStreamName=log_stream_name
+            )
+        except self.logs_client.exceptions.ResourceAlreadyExistsException:
+            pass
+        
+        self._known_streams.add(key)
         
     def log_event(self, event_type: str, event_data: Dict[str, Any]) -> None:
         """Log an event for observability."""
@@ -53,40 +103,19 @@ class AWSObservabilityService(ObservabilityService):
             }
             
             # Log locally as well
-            self.logger.info(f"Event: {event_type} - {json.dumps(log_data)}")
+            message = orjson.dumps(log_data, default=str).decode('utf-8')
+            self.logger.info(f"Event: {event_type} - {message}")
             
             # In development mode, we might not want to send to CloudWatch
             if self.environment == "development":
                 return
-                
-            # Send to CloudWatch Logs
-            log_group_name = f"/aws/lambda/{self.service_name}-{self.environment}"
-            log_stream_name = f"{datetime.now().strftime('%Y/%m/%d')}/{event_type}"
             
-            try:
-                # Try to create the log stream if it doesn't exist
-                self.logs_client.create_log_stream(
-                    logGroupName=log_group_name,
-                    logStreamName=log_stream_name
-                )
-            except Exception:
-                # Ignore ResourceAlreadyExistsException
-                pass
-            
-            # Put log event
-            try:
-                self.logs_client.put_log_events(
-                    logGroupName=log_group_name,
-                    logStreamName=log_stream_name,
-                    logEvents=[
-                        {
-                            'timestamp': int(time.time() * 1000),
-                            'message': json.dumps(log_data)
-                        }
-                    ]
-                )
-            except Exception as e:
-                self.logger.warning(f"Could not send log to CloudWatch: {str(e)}")
+            # Queue the event; it is sent with the next batch
+            log_stream_name = f"{datetime.now().strftime('%Y/%m/%d')}/{event_type}"
+            self._log_queue.put((log_stream_name, {
+                'timestamp': int(time.time() * 1000),
+                'message': message
+            }))
                 
         except Exception as e:
             self.logger.error(f"Error logging event: {str(e)}")
@@ -98,6 +127,7 @@ class AWSObservabilityService(ObservabilityService):
             metric_data = {
                 'MetricName': metric_name,
                 'Value': value,
+                'Timestamp': datetime.now(timezone.utc),
                 'Unit': 'None',  # Default unit, can be customized if needed
                 'Dimensions': [
                     {
@@ -113,10 +143,10 @@ class AWSObservabilityService(ObservabilityService):
             
             # Add custom dimensions if provided
             if dimensions:
-                for name, value in dimensions.items():
+                for name, dimension_value in dimensions.items():
                     metric_data['Dimensions'].append({
                         'Name': name,
-                        'Value': value
+                        'Value': dimension_value
                     })
             
             # Log locally as well
@@ -125,18 +155,132 @@ class AWSObservabilityService(ObservabilityService):
             # In development mode, we might not want to send to CloudWatch
             if self.environment == "development":
                 return
+            
+            # Queue the metric; it is sent with the next batch
+            self._metric_queue.put(metric_data)
                 
-            # Push metric to CloudWatch
+        except Exception as e:
+            self.logger.error(f"Error tracking metric: {str(e)}")
+    
+    def flush(self) -> None:
+        """Send all buffered log events and metrics to CloudWatch."""
+        with self._flush_lock:
+            self._flush_log_events()
+            self._flush_metrics()
+    
+    @classmethod
+    def _register_for_periodic_flush(cls, instance: "AWSObservabilityService") -> None:
+        """Add an instance to the shared flusher, starting the flusher thread on first use."""
+        with cls._flusher_lock:
+            cls._instances.add(instance)
+            if cls._flusher_thread is None:
+                cls._flusher_thread = threading.Thread(target=cls._flush_periodically, daemon=True)
+                cls._flusher_thread.start()
+                atexit.register(cls._flush_all)
+    
+    @classmethod
+    def _flush_periodically(cls) -> None:
+        """Background loop that flushes every live instance at the shortest flush_interval."""
+        while True:
+            time.sleep(min((instance.flush_interval for instance in list(cls._instances)), default=1.0))
+            cls._flush_all()
+    
+    @classmethod
+    def _flush_all(cls) -> None:
+        """Flush every live instance, logging (not raising) delivery failures."""
+        for instance in list(cls._instances):
             try:
-                self.cloudwatch_client.put_metric_data(
-                    Namespace=f"{self.service_name}/{self.environment}",
-                    MetricData=[metric_data]
-                )
+                instance.flush()
             except Exception as e:
-                self.logger.warning(f"Could not send metric to CloudWatch: {str(e)}")
-                
+                instance.logger.warning(f"Could not flush observability data to CloudWatch: {str(e)}")
+    
+    def _flush_log_events(self) -> None:
+        """Send buffered log events, one put_log_events call per stream and batch."""
+        events_by_stream: Dict[str, List[Dict[str, Any]]] = {}
+        for log_stream_name, log_event in self._drain(self._log_queue):
+            events_by_stream.setdefault(log_stream_name, []).append(log_event)
+        
+        if not events_by_stream:
+            return
+        
+        try:
+            self._ensure_log_group_exists()
         except Exception as e:
-            self.logger.error(f"Error tracking metric: {str(e)}")
+            self.logger.warning(f"Could not create log group {self.log_group_name}: {str(e)}")
+        
+        put_log_events = self.logs_client.put_log_events
+        log_group_name = self.log_group_name
+        
+        for log_stream_name, log_events in events_by_stream.items():
+            try:
+                self._ensure_log_stream_exists(log_stream_name)
+            except Exception as e:
+                self.logger.warning(f"Could not create log stream {log_stream_name}: {str(e)}")
+            
+            # CloudWatch requires the events of a batch in chronological order
+            log_events.sort(key=lambda event: event['timestamp'])
+            
+            for batch in self._split_log_events(log_events):
+                try:
+                    put_log_events(
+                        logGroupName=log_group_name,
+                        logStreamName=log_stream_name,
+                        logEvents=batch
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Could not send {len(batch)} logs to CloudWatch: {str(e)}")
+    
+    def _split_log_events(self, log_events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split log events into batches within the put_log_events count and size limits."""
+        batches = []
+        batch = []
+        batch_bytes = 0
+        
+        overhead = self.LOG_EVENT_OVERHEAD_BYTES
+        max_events = self.MAX_LOG_EVENTS_PER_CALL
+        max_bytes = self.MAX_LOG_BYTES_PER_CALL
+        
+        for log_event in log_events:
+            event_bytes = len(log_event['message'].encode('utf-8')) + overhead
+            if batch and (len(batch) >= max_events or batch_bytes + event_bytes > max_bytes):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            
+            batch.append(log_event)
+            batch_bytes += event_bytes
+        
+        if batch:
+            batches.append(batch)
+        
+        return batches
+    
+    def _flush_metrics(self) -> None:
+        """Send buffered metrics, up to MAX_METRICS_PER_CALL datums per put_metric_data call."""
+        metrics = self._drain(self._metric_queue)
+        put_metric_data = self.cloudwatch_client.put_metric_data
+        namespace = f"{self.service_name}/{self.environment}"
+        batch_size = self.MAX_METRICS_PER_CALL
+        
+        for i in range(0, len(metrics), batch_size):
+            batch = metrics[i:i + batch_size]
+            try:
+                put_metric_data(
+                    Namespace=namespace,
+                    MetricData=batch
+                )
+            except Exception as e:
+                self.logger.warning(f"Could not send {len(batch)} metrics to CloudWatch: {str(e)}")
+    
+    @staticmethod
+    def _drain(buffer: queue.Queue) -> List[Any]:
+        """Remove and return everything currently in the queue."""
+        items = []
+        while True:
+            try:
+                items.append(buffer.get_nowait())
+            except queue.Empty:
+                return items
     
     def start_trace(self, trace_name: str, trace_data: Dict[str, Any] = None) -> str:
         """Start a new trace and return the trace ID."""
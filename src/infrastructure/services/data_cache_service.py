@@ -2,37 +2,59 @@
 import os
 import json
 import logging
+import mmap
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import hashlib
-import pickle
+
+import orjson
 
 class DataCacheService:
     """Service for caching financial data to reduce API calls."""
     
-    def __init__(self, cache_dir: str = None, ttl_minutes: int = 60):
+    def __init__(self, cache_dir: str = None, ttl_minutes: int = 60, max_memory_entries: int = 256):
         self.logger = logging.getLogger(__name__)
         self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
         self.ttl = timedelta(minutes=ttl_minutes)
         os.makedirs(self.cache_dir, exist_ok=True)
+        
+        # In-process LRU tier in front of the disk cache: key -> (cached_at, data)
+        self.max_memory_entries = max_memory_entries
+        self._mem: "OrderedDict[str, Tuple[datetime, Any]]" = OrderedDict()
+        self._mem_lock = threading.Lock()
     
     def get(self, cache_key: str) -> Optional[Any]:
         try:
+            with self._mem_lock:
+                entry = self._mem.get(cache_key)
+                if entry is not None:
+                    cache_datetime, data = entry
+                    if datetime.now() - cache_datetime <= self.ttl:
+                        self._mem.move_to_end(cache_key)
+                        return data
+                    del self._mem[cache_key]
+            
             file_path = self._get_cache_path(cache_key)
-            if not os.path.exists(file_path):
+            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
                 return None
             
+            # Parse straight from the mapped file, without reading it into a bytes copy first
             with open(file_path, 'rb') as f:
-                cache_data = pickle.load(f)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        cache_data = orjson.loads(view)
             
             timestamp = cache_data.get('timestamp')
-            if timestamp:
-                cache_datetime = datetime.fromisoformat(timestamp)
-                if datetime.now() - cache_datetime > self.ttl:
-                    self.logger.debug(f"Cache expired for key: {cache_key}")
-                    return None
+            cache_datetime = datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+            if datetime.now() - cache_datetime > self.ttl:
+                self.logger.debug(f"Cache expired for key: {cache_key}")
+                return None
             
-            return cache_data.get('data')
+            data = cache_data.get('data')
+            self._remember(cache_key, cache_datetime, data)
+            return data
             
         except Exception as e:
             self.logger.warning(f"Error retrieving from cache: {str(e)}")
@@ -42,14 +64,19 @@ class DataCacheService:
         try:
             file_path = self._get_cache_path(cache_key)
             
+            cached_at = datetime.now()
             cache_data = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': cached_at.isoformat(),
                 'data': data
             }
             
+            # Dataclasses and datetimes are written as JSON objects and ISO-8601 strings
+            payload = orjson.dumps(cache_data, option=orjson.OPT_SERIALIZE_NUMPY)
             with open(file_path, 'wb') as f:
-                pickle.dump(cache_data, f)
+                f.write(payload)
             
+            # Keep the memory tier in the same JSON form the disk tier returns
+            self._remember(cache_key, cached_at, orjson.loads(payload)['data'])
             return True
             
         except Exception as e:
@@ -58,6 +85,9 @@ class DataCacheService:
     
     def invalidate(self, cache_key: str) -> bool:
         try:
+            with self._mem_lock:
+                self._mem.pop(cache_key, None)
+            
             file_path = self._get_cache_path(cache_key)
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -69,6 +99,9 @@ class DataCacheService:
     
     def clear(self) -> bool:
         try:
+            with self._mem_lock:
+                self._mem.clear()
+            
             for filename in os.listdir(self.cache_dir):
                 file_path = os.path.join(self.cache_dir, filename)
                 if os.path.isfile(file_path):
@@ -78,6 +111,13 @@ class DataCacheService:
             self.logger.warning(f"Error clearing cache: {str(e)}")
             return False
     
+    def _remember(self, cache_key: str, cached_at: datetime, data: Any) -> None:
+        with self._mem_lock:
+            self._mem[cache_key] = (cached_at, data)
+            self._mem.move_to_end(cache_key)
+            while len(self._mem) > self.max_memory_entries:
+                self._mem.popitem(last=False)
+    
     def _get_cache_path(self, cache_key: str) -> str:
-        hashed_key = hashlib.md5(cache_key.encode()).hexdigest()
+        hashed_key = hashlib.blake2b(cache_key.encode(), digest_size=8).hexdigest()
         return os.path.join(self.cache_dir, f"{hashed_key}.cache")
\ No newline at end of file
@@ -0,0 +1,57 @@
+# src/infrastructure/services/duckdb_data_processing_service.py
+import functools
+from typing import Dict, Tuple
+
+import duckdb
+import pandas as pd
+import numpy as np
+
+from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
+
+
+@functools.lru_cache(maxsize=None)
+def _rolling_query(windows: Tuple[int, ...]) -> str:
+    """SQL for the rolling mean/std of each window (NULL until the window holds that many prices)."""
+    columns = []
+    for window in windows:
+        columns.append(f"CASE WHEN count(close) OVER w{window} = {window} THEN avg(close) OVER w{window} END AS sma_{window}")
+        columns.append(f"CASE WHEN count(close) OVER w{window} = {window} THEN stddev_samp(close) OVER w{window} END AS std_{window}")
+    
+    frames = [f"w{window} AS (ORDER BY position ROWS BETWEEN {window - 1} PRECEDING AND CURRENT ROW)" for window in windows]
+    
+    return f"SELECT {', '.join(columns)} FROM prices WINDOW {', '.join(frames)} ORDER BY position"
+
+
+class DuckDBDataProcessingService(PandasDataProcessingService):
+    """Implementation of DataProcessingService that runs the rolling window statistics in DuckDB.
+    
+    The batch stays in process (no JVM or Arrow round-trips as with Spark); the SMA, Bollinger Bands
+    and trend windows are DuckDB window functions and the remaining indicators are shared with pandas.
+    """
+    
+    def __init__(self, connection=None):
+        super().__init__()
+        self._connection = connection or duckdb.connect()
+    
+    def _rolling_statistics(self, close: np.ndarray) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Rolling mean and standard deviation of the close prices, as DuckDB window functions."""
+        windows = tuple(window for window in self.ROLLING_WINDOWS if close is not None and len(close) >= window)
+        if not windows:
+            return {}
+        
+        # A cursor per batch: DuckDB connections are not shared between threads
+        cursor = self._connection.cursor()
+        try:
+            # The prices are already sorted, so their position orders the windows
+            cursor.register('prices', pd.DataFrame({'position': np.arange(len(close)), 'close': close}))
+            rolling_df = cursor.execute(_rolling_query(windows)).fetchdf()
+        finally:
+            cursor.close()
+        
+        return {
+            window: (
+                rolling_df[f'sma_{window}'].to_numpy(dtype=np.float64),
+                rolling_df[f'std_{window}'].to_numpy(dtype=np.float64)
+            )
+            for window in windows
+        }
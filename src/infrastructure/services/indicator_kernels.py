@@ -0,0 +1,262 @@
+# src/infrastructure/services/indicator_kernels.py
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# numba caches the compiled kernels next to this file; when the package is read-only
+# (e.g. a Lambda layer) fall back to the temp dir unless NUMBA_CACHE_DIR is configured
+if not os.access(os.path.dirname(os.path.abspath(__file__)), os.W_OK):
+    os.environ.setdefault('NUMBA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'numba_cache'))
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional: without it the vectorized numpy versions below are used
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def _sma_std_numpy(close: np.ndarray, window: int):
+    """Rolling mean and sample standard deviation (NaN until the window is full)."""
+    n = close.shape[0]
+    sma = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return sma, std
+
+    windows = sliding_window_view(close, window)
+    sma[window - 1:] = windows.mean(axis=1)
+    if window > 1:
+        std[window - 1:] = windows.std(axis=1, ddof=1)
+    return sma, std
+
+
+def _rsi_numpy(close: np.ndarray, window: int):
+    """RSI from the simple rolling mean of gains and losses (NaN where undefined)."""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    if window <= 0 or n <= window:
+        return rsi
+
+    change = np.diff(close)
+    avg_gain = sliding_window_view(np.maximum(change, 0.0), window).mean(axis=1)
+    avg_loss = sliding_window_view(np.maximum(-change, 0.0), window).mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / np.where(avg_loss == 0.0, np.nan, avg_loss)
+    rsi[window:] = 100.0 - 100.0 / (1.0 + rs)
+    return rsi
+
+
+def _ema_pandas(values: np.ndarray, span: int):
+    """Exponential moving average (adjust=False), as computed by pandas."""
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def pivot_flags(close: np.ndarray, window: int):
+    """Flag points that are the max (pivot high) or min (pivot low) of the window around them."""
+    n = close.shape[0]
+    is_high = np.zeros(n, dtype=bool)
+    is_low = np.zeros(n, dtype=bool)
+    if window <= 0 or n < 2 * window + 1:
+        return is_high, is_low
+
+    windows = sliding_window_view(close, 2 * window + 1)
+    center = close[window:n - window]
+    is_high[window:n - window] = windows.max(axis=1) == center
+    is_low[window:n - window] = windows.min(axis=1) == center
+    return is_high, is_low
+
+
+def _sma_std_loop(close, window):
+    """Single-pass rolling mean and sample standard deviation (sliding Welford update)."""
+    n = close.shape[0]
+    sma = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return sma, std
+
+    mean = 0.0
+    m2 = 0.0
+    nan_count = 0
+    valid = False
+
+    for i in range(n):
+        x_in = close[i]
+        if np.isnan(x_in):
+            nan_count += 1
+        if i >= window and np.isnan(close[i - window]):
+            nan_count -= 1
+        if i < window - 1:
+            continue
+        if nan_count > 0:
+            valid = False
+            continue
+
+        if not valid:
+            # (Re)start the window statistics from scratch
+            mean = 0.0
+            for j in range(i - window + 1, i + 1):
+                mean += close[j]
+            mean /= window
+            m2 = 0.0
+            for j in range(i - window + 1, i + 1):
+                d = close[j] - mean
+                m2 += d * d
+            valid = True
+        else:
+            # Slide the window: add close[i], drop close[i - window]
+            x_out = close[i - window]
+            old_mean = mean
+            mean = old_mean + (x_in - x_out) / window
+            m2 += (x_in - x_out) * (x_in - mean + x_out - old_mean)
+            if m2 < 0.0:
+                m2 = 0.0
+
+        sma[i] = mean
+        if window > 1:
+            std[i] = np.sqrt(m2 / (window - 1))
+
+    return sma, std
+
+
+def _ema_update(weighted, old_wt, cur, alpha):
+    """Advance an adjust=False EMA by one value, following pandas' handling of NaN gaps."""
+    if not np.isnan(weighted):
+        # Gaps keep decaying the weight of the previous average
+        old_wt *= 1.0 - alpha
+        if not np.isnan(cur):
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+    elif not np.isnan(cur):
+        weighted = cur
+    return weighted, old_wt
+
+
+def _ema_loop(values, span):
+    """Exponential moving average (adjust=False)."""
+    n = values.shape[0]
+    ema = np.full(n, np.nan)
+    if n == 0:
+        return ema
+
+    alpha = 2.0 / (span + 1.0)
+    weighted = values[0]
+    old_wt = 1.0
+    ema[0] = weighted
+
+    for i in range(1, n):
+        weighted, old_wt = _ema_update(weighted, old_wt, values[i], alpha)
+        ema[i] = weighted
+
+    return ema
+
+
+def _macd_loop(close, fast_period, slow_period, signal_period):
+    """MACD line, signal line and histogram from the fast, slow and signal EMAs in one pass."""
+    n = close.shape[0]
+    macd = np.full(n, np.nan)
+    signal = np.full(n, np.nan)
+    histogram = np.full(n, np.nan)
+    if n == 0:
+        return macd, signal, histogram
+
+    alpha_fast = 2.0 / (fast_period + 1.0)
+    alpha_slow = 2.0 / (slow_period + 1.0)
+    alpha_signal = 2.0 / (signal_period + 1.0)
+
+    ema_fast = close[0]
+    ema_slow = close[0]
+    ema_signal = ema_fast - ema_slow
+    wt_fast = 1.0
+    wt_slow = 1.0
+    wt_signal = 1.0
+    macd[0] = ema_fast - ema_slow
+    signal[0] = ema_signal
+    histogram[0] = macd[0] - ema_signal
+
+    for i in range(1, n):
+        ema_fast, wt_fast = _ema_update(ema_fast, wt_fast, close[i], alpha_fast)
+        ema_slow, wt_slow = _ema_update(ema_slow, wt_slow, close[i], alpha_slow)
+        line = ema_fast - ema_slow
+        ema_signal, wt_signal = _ema_update(ema_signal, wt_signal, line, alpha_signal)
+        macd[i] = line
+        signal[i] = ema_signal
+        histogram[i] = line - ema_signal
+
+    return macd, signal, histogram
+
+
+def _macd_pandas(close: np.ndarray, fast_period: int, slow_period: int, signal_period: int):
+    """MACD line, signal line and histogram from pandas EMAs."""
+    macd = _ema_pandas(close, fast_period) - _ema_pandas(close, slow_period)
+    signal = _ema_pandas(macd, signal_period)
+    return macd, signal, macd - signal
+
+
+def _rsi_loop(close, window):
+    """Single-pass RSI using sliding sums of gains and losses."""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    if window <= 0 or n <= window:
+        return rsi
+
+    gain_sum = 0.0
+    loss_sum = 0.0
+    nan_count = 0
+    loss_count = 0
+
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        if np.isnan(change):
+            nan_count += 1
+        elif change > 0.0:
+            gain_sum += change
+        elif change < 0.0:
+            loss_sum -= change
+            loss_count += 1
+
+        if i > window:
+            old_change = close[i - window] - close[i - window - 1]
+            if np.isnan(old_change):
+                nan_count -= 1
+            elif old_change > 0.0:
+                gain_sum -= old_change
+            elif old_change < 0.0:
+                loss_sum += old_change
+                loss_count -= 1
+
+        if i < window or nan_count > 0:
+            continue
+
+        # Without any loss in the window RS is undefined (as in the pandas version)
+        if loss_count == 0:
+            continue
+
+        avg_gain = max(gain_sum, 0.0) / window
+        avg_loss = loss_sum / window
+        rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    return rsi
+
+
+if NUMBA_AVAILABLE:
+    # Compiled first so the kernels below call the machine-code version
+    _ema_update = njit(cache=True, nogil=True)(_ema_update)
+
+    # Compiled lazily so the kernels accept the read-only arrays pandas (Copy-on-Write) and
+    # pyarrow hand out; cache=True keeps the machine code between runs and nogil=True lets
+    # the service run several kernels on threads at once
+    sma_std = njit(cache=True, nogil=True)(_sma_std_loop)
+    rsi = njit(cache=True, nogil=True)(_rsi_loop)
+    ema = njit(cache=True, nogil=True)(_ema_loop)
+    macd = njit(cache=True, nogil=True)(_macd_loop)
+else:
+    sma_std = _sma_std_numpy
+    rsi = _rsi_numpy
+    ema = _ema_pandas
+    macd = _macd_pandas
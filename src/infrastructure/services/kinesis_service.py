@@ -1,10 +1,136 @@
+# src/infrastructure/services/kinesis_service.py
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Deque, List, Optional, Tuple, Union
+
 import boto3
 
+
 class KinesisService:
-    def __init__(self, stream_name):
+    """Service that sends records to a Kinesis stream in put_records batches."""
+
+    # Limits of one put_records call (500 records / 5 MiB, with some headroom)
+    MAX_RECORDS_PER_CALL = 500
+    MAX_BYTES_PER_CALL = 4_500_000
+
+    # One sender thread shared by every live instance (weakly referenced, so an
+    # instance is not kept alive by the thread or the exit hook)
+    _instances: "weakref.WeakSet[KinesisService]" = weakref.WeakSet()
+    _sender_lock = threading.Lock()
+    _sender_thread: Optional[threading.Thread] = None
+    _flush_requested = threading.Event()
+
+    def __init__(self, stream_name, kinesis_client=None, linger_ms: int = 200, max_retries: int = 3):
+        self.logger = logging.getLogger(__name__)
         self.stream_name = stream_name
-        self.kinesis_client = boto3.client('kinesis')
-    
-    def put_record(self, data, partition_key):
-        # Implementao para enviar dados para o Kinesis
-        pass
+        self.kinesis_client = kinesis_client or boto3.client('kinesis')
+        self.linger = linger_ms / 1000
+        self.max_retries = max_retries
+
+        # Buffer of (data, partition_key, size in bytes) waiting to be sent
+        self._buffer: Deque[Tuple[bytes, str, int]] = deque()
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        # The shared sender empties the buffer every linger_ms or as soon as a batch is full
+        self._register_for_periodic_send(self)
+
+    def put_record(self, data: Union[bytes, str], partition_key: str) -> None:
+        """Queue a record to be sent with the next batch."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        size = len(data) + len(partition_key.encode('utf-8'))
+
+        with self._lock:
+            self._buffer.append((data, partition_key, size))
+            self._buffer_bytes += size
+            batch_full = (len(self._buffer) >= self.MAX_RECORDS_PER_CALL or
+                          self._buffer_bytes >= self.MAX_BYTES_PER_CALL)
+
+        if batch_full:
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        """Send every buffered record to the stream."""
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return
+                self._send_batch(batch)
+
+    @classmethod
+    def _register_for_periodic_send(cls, instance: "KinesisService") -> None:
+        """Add an instance to the shared sender, starting the sender thread on first use."""
+        with cls._sender_lock:
+            cls._instances.add(instance)
+            if cls._sender_thread is None:
+                cls._sender_thread = threading.Thread(target=cls._send_periodically, daemon=True)
+                cls._sender_thread.start()
+                atexit.register(cls._flush_all)
+
+    @classmethod
+    def _send_periodically(cls) -> None:
+        """Background loop that flushes every live instance at the shortest linger or when a batch fills up."""
+        while True:
+            cls._flush_requested.wait(min((instance.linger for instance in list(cls._instances)), default=0.2))
+            cls._flush_requested.clear()
+            cls._flush_all()
+
+    @classmethod
+    def _flush_all(cls) -> None:
+        """Flush every live instance, logging (not raising) delivery failures."""
+        for instance in list(cls._instances):
+            try:
+                instance.flush()
+            except Exception as e:
+                instance.logger.error(f"Error flushing records to Kinesis stream {instance.stream_name}: {str(e)}")
+
+    def _take_batch(self) -> List[Tuple[bytes, str, int]]:
+        """Remove from the buffer as many records as fit in one put_records call."""
+        batch = []
+        batch_bytes = 0
+
+        with self._lock:
+            while self._buffer:
+                size = self._buffer[0][2]
+                if batch and (len(batch) >= self.MAX_RECORDS_PER_CALL or
+                              batch_bytes + size > self.MAX_BYTES_PER_CALL):
+                    break
+
+                batch.append(self._buffer.popleft())
+                batch_bytes += size
+                self._buffer_bytes -= size
+
+        return batch
+
+    def _send_batch(self, batch: List[Tuple[bytes, str, int]]) -> None:
+        """Send one batch, retrying the records rejected by the stream."""
+        records = batch
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                response = self.kinesis_client.put_records(
+                    StreamName=self.stream_name,
+                    Records=[{'Data': data, 'PartitionKey': partition_key} for data, partition_key, _ in records]
+                )
+
+                if response.get('FailedRecordCount', 0) == 0:
+                    return
+
+                # Resend only the rejected records (e.g. shard throttling)
+                records = [
+                    record for record, result in zip(records, response['Records'])
+                    if 'ErrorCode' in result
+                ]
+                time.sleep(0.1 * 2 ** attempt)
+
+            self.logger.error(f"Failed to send {len(records)} records to Kinesis stream {self.stream_name}")
+
+        except Exception as e:
+            self.logger.error(f"Error sending {len(records)} records to Kinesis stream {self.stream_name}: {str(e)}")
@@ -1,73 +1,118 @@
 # src/infrastructure/services/pandas_data_processing_service.py
 import logging
-from typing import List, Dict, Any, Optional
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 import pandas as pd
 import numpy as np
 
-from src.domain.interfaces.services import DataProcessingService
+from src.domain.interfaces.services import DataProcessingService, IndicatorSeries
+from src.infrastructure.services import indicator_kernels
 
 
 class PandasDataProcessingService(DataProcessingService):
     """Implementation of DataProcessingService using pandas for financial data analysis."""
     
+    # Batches smaller than this are computed sequentially (thread hand-off would dominate)
+    PARALLEL_MIN_ROWS = 10000
+    
+    # Windows of the rolling mean/std shared by the SMA, Bollinger Bands and trend detection
+    ROLLING_WINDOWS = (5, 20, 50)
+    
+    # Record fields used by the indicators; anything else in the batch is ignored
+    PRICE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    
+    # Columns of each result when it has no data (the shape its calculation returns for a short batch);
+    # indicators not listed are single {'timestamp', 'value'} series
+    EMPTY_RESULT_COLUMNS = {
+        'bollinger_bands': ('timestamp', 'upper', 'middle', 'lower'),
+        'macd': ('timestamp', 'macd', 'signal', 'histogram'),
+        'statistics': (),
+        'volatility': (),
+        'trends': ()
+    }
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=os.cpu_count()) if indicator_kernels.NUMBA_AVAILABLE else None
     
     def process_batch_data(self, batch_id: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Process a batch of data to calculate technical indicators."""
         try:
             self.logger.info(f"Processing batch {batch_id} with {len(data)} records")
             
-            # Convert to DataFrame for easier processing
-            df = pd.DataFrame(data)
+            # Convert to DataFrame for easier processing (only the price columns the records carry)
+            columns = [column for column in self.PRICE_COLUMNS if column in data[0]] if data else None
+            df = pd.DataFrame.from_records(data, columns=columns)
             
             # Make sure timestamp is datetime
             if 'timestamp' in df.columns:
                 if isinstance(df['timestamp'].iloc[0], str):
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
+                    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
                 
                 # Sort by timestamp
-                df = df.sort_values('timestamp')
+                df = df.sort_values('timestamp', kind='stable', ignore_index=True)
             
-            # Calculate technical indicators
-            result = {}
+            # Extract the columns once; the indicators work on these arrays instead of DataFrame copies
+            close = df['close'].to_numpy(dtype=np.float64) if 'close' in df.columns else None
+            timestamps = (
+                np.array(self._format_timestamps(df['timestamp']), dtype=object)
+                if 'timestamp' in df.columns else None
+            )
+            
+            # Rolling mean/std per window, computed once and shared by the SMA, Bollinger and trend outputs
+            rolling = self._rolling_statistics(close)
+            
+            # Technical indicators to calculate, in output order
+            tasks = {}
             
             # Moving Averages
             if len(df) >= 5:
-                result['sma_5'] = self._calculate_sma(df, 5)
+                tasks['sma_5'] = (self._calculate_sma, timestamps, rolling, 5)
             if len(df) >= 20:
-                result['sma_20'] = self._calculate_sma(df, 20)
+                tasks['sma_20'] = (self._calculate_sma, timestamps, rolling, 20)
             if len(df) >= 50:
-                result['sma_50'] = self._calculate_sma(df, 50)
+                tasks['sma_50'] = (self._calculate_sma, timestamps, rolling, 50)
             if len(df) >= 5:
-                result['ema_5'] = self._calculate_ema(df, 5)
+                tasks['ema_5'] = (self._calculate_ema, timestamps, close, 5)
             if len(df) >= 20:
-                result['ema_20'] = self._calculate_ema(df, 20)
+                tasks['ema_20'] = (self._calculate_ema, timestamps, close, 20)
             
             # Relative Strength Index
             if len(df) >= 14:
-                result['rsi_14'] = self._calculate_rsi(df, 14)
+                tasks['rsi_14'] = (self._calculate_rsi, timestamps, close, 14)
             
             # Bollinger Bands
             if len(df) >= 20:
-                result['bollinger_bands'] = self._calculate_bollinger_bands(df, 20, 2)
+                tasks['bollinger_bands'] = (self._calculate_bollinger_bands, timestamps, rolling, 20, 2)
             
             # MACD
             if len(df) >= 26:
-                result['macd'] = self._calculate_macd(df, 12, 26, 9)
+                tasks['macd'] = (self._calculate_macd, timestamps, close, 12, 26, 9)
+            
+            # Daily returns, shared by the statistics and volatility metrics
+            returns = self._daily_returns(close)
+            returns_std = self._returns_std(returns)
             
             # Basic Statistics
-            result['statistics'] = self._calculate_statistics(df)
+            tasks['statistics'] = (self._calculate_statistics, df, close, returns, returns_std)
             
             # Volatility
             if len(df) >= 2:
-                result['volatility'] = self._calculate_volatility(df)
+                tasks['volatility'] = (self._calculate_volatility, df, close, returns_std)
             
             # Trends
             if len(df) >= 20:
-                result['trends'] = self._detect_trends(df)
+                tasks['trends'] = (self._detect_trends, timestamps, close, rolling)
+            
+            # The compiled kernels release the GIL, so large batches compute the indicators concurrently
+            if self._executor is not None and len(df) >= self.PARALLEL_MIN_ROWS:
+                futures = {name: self._executor.submit(self._run_task, name, *task) for name, task in tasks.items()}
+                result = {name: future.result() for name, future in futures.items()}
+            else:
+                result = {name: self._run_task(name, *task) for name, task in tasks.items()}
             
             return result
             
@@ -76,6 +121,14 @@ class PandasDataProcessingService(DataProcessingService):
             # Return empty result on error
             return {"error": str(e)}
     
+    def _run_task(self, name: str, calculate, *args) -> Any:
+        """Run one indicator calculation; a failure leaves that indicator empty instead of failing the batch."""
+        try:
+            return calculate(*args)
+        except Exception as e:
+            self.logger.error(f"Error calculating {name}: {str(e)}")
+            return {column: [] for column in self.EMPTY_RESULT_COLUMNS.get(name, ('timestamp', 'value'))}
+    
     def process_stream_data(self, stream_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process streaming data."""
         try:
@@ -105,165 +158,126 @@ class PandasDataProcessingService(DataProcessingService):
             self.logger.error(f"Error processing stream data: {str(e)}")
             return None
     
-    def _calculate_sma(self, df: pd.DataFrame, window: int) -> List[Dict[str, Any]]:
+    def _rolling_statistics(self, close: np.ndarray) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Rolling mean and standard deviation of the close prices for each window that fits the batch."""
+        return {
+            window: indicator_kernels.sma_std(close, window)
+            for window in self.ROLLING_WINDOWS
+            if close is not None and len(close) >= window
+        }
+    
+    def _calculate_sma(self, timestamps: np.ndarray, rolling: Dict[int, Tuple[np.ndarray, np.ndarray]], window: int) -> IndicatorSeries:
         """Calculate Simple Moving Average."""
-        if len(df) < window or 'close' not in df.columns or 'timestamp' not in df.columns:
-            return []
+        if timestamps is None or window not in rolling:
+            return {'timestamp': [], 'value': []}
         
-        # Calculate SMA
-        df_result = df.copy()
-        df_result['sma'] = df['close'].rolling(window=window).mean()
+        # SMA from the batch's rolling statistics
+        sma, _ = rolling[window]
         
-        # Convert to list of dicts
-        result = []
-        for _, row in df_result.dropna().iterrows():
-            result.append({
-                'timestamp': row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp'],
-                'value': float(row['sma'])
-            })
-        
-        return result
+        # Convert to columns
+        mask = ~np.isnan(sma)
+        return self._to_series(timestamps[mask], sma[mask])
     
-    def _calculate_ema(self, df: pd.DataFrame, window: int) -> List[Dict[str, Any]]:
+    def _calculate_ema(self, timestamps: np.ndarray, close: np.ndarray, window: int) -> IndicatorSeries:
         """Calculate Exponential Moving Average."""
-        if len(df) < window or 'close' not in df.columns or 'timestamp' not in df.columns:
-            return []
+        if close is None or timestamps is None or len(close) < window:
+            return {'timestamp': [], 'value': []}
         
         # Calculate EMA
-        df_result = df.copy()
-        df_result['ema'] = df['close'].ewm(span=window, adjust=False).mean()
-        
-        # Convert to list of dicts
-        result = []
-        for _, row in df_result.iterrows():
-            result.append({
-                'timestamp': row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp'],
-                'value': float(row['ema'])
-            })
-        
-        return result
+        ema = indicator_kernels.ema(close, window)
+        
+        # Convert to columns
+        return self._to_series(timestamps, ema)
     
-    def _calculate_rsi(self, df: pd.DataFrame, window: int) -> List[Dict[str, Any]]:
+    def _calculate_rsi(self, timestamps: np.ndarray, close: np.ndarray, window: int) -> IndicatorSeries:
         """Calculate Relative Strength Index."""
-        if len(df) < window + 1 or 'close' not in df.columns or 'timestamp' not in df.columns:
-            return []
-        
-        # Calculate price changes
-        df_result = df.copy()
-        df_result['change'] = df_result['close'].diff()
+        if close is None or timestamps is None or len(close) < window + 1:
+            return {'timestamp': [], 'value': []}
         
-        # Calculate gains and losses
-        df_result['gain'] = df_result['change'].apply(lambda x: max(x, 0))
-        df_result['loss'] = df_result['change'].apply(lambda x: abs(min(x, 0)))
+        # Calculate RSI from the rolling average gains and losses in a single pass
+        rsi = indicator_kernels.rsi(close, window)
         
-        # Calculate average gains and losses
-        df_result['avg_gain'] = df_result['gain'].rolling(window=window).mean()
-        df_result['avg_loss'] = df_result['loss'].rolling(window=window).mean()
-        
-        # Calculate RS and RSI
-        df_result['rs'] = df_result['avg_gain'] / df_result['avg_loss'].replace(0, np.nan)
-        df_result['rsi'] = 100 - (100 / (1 + df_result['rs']))
-        
-        # Convert to list of dicts
-        result = []
-        for _, row in df_result.dropna().iterrows():
-            result.append({
-                'timestamp': row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp'],
-                'value': float(row['rsi'])
-            })
-        
-        return result
+        # Convert to columns
+        mask = ~np.isnan(rsi)
+        return self._to_series(timestamps[mask], rsi[mask])
     
-    def _calculate_bollinger_bands(self, df: pd.DataFrame, window: int, std_dev: float) -> Dict[str, List[Dict[str, Any]]]:
+    def _calculate_bollinger_bands(self, timestamps: np.ndarray, rolling: Dict[int, Tuple[np.ndarray, np.ndarray]], window: int, std_dev: float) -> IndicatorSeries:
         """Calculate Bollinger Bands."""
-        if len(df) < window or 'close' not in df.columns or 'timestamp' not in df.columns:
-            return {'upper': [], 'middle': [], 'lower': []}
+        if timestamps is None or window not in rolling:
+            return {'timestamp': [], 'upper': [], 'middle': [], 'lower': []}
         
-        # Calculate SMA (middle band)
-        df_result = df.copy()
-        df_result['middle'] = df['close'].rolling(window=window).mean()
-        
-        # Calculate standard deviation
-        df_result['std'] = df['close'].rolling(window=window).std()
+        # SMA (middle band) and standard deviation from the batch's rolling statistics
+        middle, std = rolling[window]
         
         # Calculate upper and lower bands
-        df_result['upper'] = df_result['middle'] + (df_result['std'] * std_dev)
-        df_result['lower'] = df_result['middle'] - (df_result['std'] * std_dev)
-        
-        # Convert to dict of lists
-        result = {
-            'upper': [],
-            'middle': [],
-            'lower': []
-        }
+        upper = middle + std * std_dev
+        lower = middle - std * std_dev
         
-        for _, row in df_result.dropna().iterrows():
-            timestamp = row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp']
-            
-            result['upper'].append({
-                'timestamp': timestamp,
-                'value': float(row['upper'])
-            })
-            
-            result['middle'].append({
-                'timestamp': timestamp,
-                'value': float(row['middle'])
-            })
-            
-            result['lower'].append({
-                'timestamp': timestamp,
-                'value': float(row['lower'])
-            })
-        
-        return result
+        # Convert to columns
+        return self._to_valid_series(timestamps, upper=upper, middle=middle, lower=lower)
     
-    def _calculate_macd(self, df: pd.DataFrame, fast_period: int, slow_period: int, signal_period: int) -> Dict[str, List[Dict[str, Any]]]:
+    def _calculate_macd(self, timestamps: np.ndarray, close: np.ndarray, fast_period: int, slow_period: int, signal_period: int) -> IndicatorSeries:
         """Calculate Moving Average Convergence Divergence."""
-        if len(df) < max(fast_period, slow_period, signal_period) or 'close' not in df.columns or 'timestamp' not in df.columns:
-            return {'macd': [], 'signal': [], 'histogram': []}
-        
-        # Calculate EMAs
-        df_result = df.copy()
-        df_result['ema_fast'] = df['close'].ewm(span=fast_period, adjust=False).mean()
-        df_result['ema_slow'] = df['close'].ewm(span=slow_period, adjust=False).mean()
+        if close is None or timestamps is None or len(close) < max(fast_period, slow_period, signal_period):
+            return {'timestamp': [], 'macd': [], 'signal': [], 'histogram': []}
         
-        # Calculate MACD line
-        df_result['macd'] = df_result['ema_fast'] - df_result['ema_slow']
+        # Calculate MACD line, signal line and histogram (fast, slow and signal EMAs in one pass)
+        macd, signal, histogram = indicator_kernels.macd(close, fast_period, slow_period, signal_period)
         
-        # Calculate signal line
-        df_result['signal'] = df_result['macd'].ewm(span=signal_period, adjust=False).mean()
-        
-        # Calculate histogram
-        df_result['histogram'] = df_result['macd'] - df_result['signal']
-        
-        # Convert to dict of lists
-        result = {
-            'macd': [],
-            'signal': [],
-            'histogram': []
+        # Convert to columns
+        return self._to_valid_series(timestamps, macd=macd, signal=signal, histogram=histogram)
+    
+    @staticmethod
+    def _format_timestamps(timestamps: pd.Series) -> List[Any]:
+        """Convert a timestamp column to ISO strings (non-datetime values are kept as is)."""
+        # Naive whole-second timestamps (the usual price data) are formatted in a single vectorized pass
+        if pd.api.types.is_datetime64_dtype(timestamps) and not timestamps.isna().any():
+            if (timestamps.dt.microsecond == 0).all() and (timestamps.dt.nanosecond == 0).all():
+                return timestamps.dt.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+        
+        return [t.isoformat() if isinstance(t, datetime) else t for t in timestamps.tolist()]
+    
+    @staticmethod
+    def _to_series(timestamps: np.ndarray, values: np.ndarray) -> IndicatorSeries:
+        """Convert aligned timestamps and values into {'timestamp', 'value'} columns."""
+        return {'timestamp': timestamps.tolist(), 'value': values.tolist()}
+    
+    @staticmethod
+    def _to_valid_series(timestamps: np.ndarray, **series: np.ndarray) -> IndicatorSeries:
+        """Convert aligned series into columns, keeping the timestamps where every series is defined."""
+        invalid = np.zeros(len(timestamps), dtype=bool)
+        for values in series.values():
+            invalid |= np.isnan(values)
+        
+        # Normally only the warm-up prefix is undefined, so a slice (a view) is enough;
+        # gaps in the prices fall back to a boolean mask
+        start = int(np.argmin(invalid)) if not invalid.all() else len(invalid)
+        select = ~invalid if invalid[start:].any() else slice(start, None)
+        
+        return {
+            'timestamp': timestamps[select].tolist(),
+            **{name: values[select].tolist() for name, values in series.items()}
         }
+    
+    @staticmethod
+    def _daily_returns(close: np.ndarray) -> Optional[np.ndarray]:
+        """Period-over-period returns of the close prices (None when there are fewer than two prices)."""
+        if close is None or len(close) < 2:
+            return None
         
-        for _, row in df_result.dropna().iterrows():
-            timestamp = row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp']
-            
-            result['macd'].append({
-                'timestamp': timestamp,
-                'value': float(row['macd'])
-            })
-            
-            result['signal'].append({
-                'timestamp': timestamp,
-                'value': float(row['signal'])
-            })
-            
-            result['histogram'].append({
-                'timestamp': timestamp,
-                'value': float(row['histogram'])
-            })
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return close[1:] / close[:-1] - 1.0
+    
+    @staticmethod
+    def _returns_std(returns: Optional[np.ndarray]) -> Optional[float]:
+        """Sample standard deviation of the returns, ignoring missing values."""
+        if returns is None:
+            return None
         
-        return result
+        valid = returns[~np.isnan(returns)]
+        return float(valid.std(ddof=1)) if len(valid) > 1 else float('nan')
     
-    def _calculate_statistics(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_statistics(self, df: pd.DataFrame, close: np.ndarray, returns: Optional[np.ndarray], returns_std: Optional[float]) -> Dict[str, Any]:
         """Calculate basic statistics for the data."""
         if 'close' not in df.columns or 'timestamp' not in df.columns:
             return {}
@@ -288,88 +302,84 @@ class PandasDataProcessingService(DataProcessingService):
             stats['avg_volume'] = float(df['volume'].mean()) if len(df) > 0 else None
         
         # Return statistics
-        if len(df) > 1:
-            df_temp = df.copy()
-            df_temp['return'] = df_temp['close'].pct_change()
-            stats['avg_daily_return'] = float(df_temp['return'].mean()) if len(df_temp) > 1 else None
-            stats['std_daily_return'] = float(df_temp['return'].std()) if len(df_temp) > 1 else None
+        if returns is not None:
+            valid_returns = returns[~np.isnan(returns)]
+            stats['avg_daily_return'] = float(valid_returns.mean()) if len(valid_returns) > 0 else float('nan')
+            stats['std_daily_return'] = returns_std
             
             # Compute total return
-            first_price = df_temp['close'].iloc[0]
-            last_price = df_temp['close'].iloc[-1]
-            stats['total_return'] = float((last_price - first_price) / first_price)
+            stats['total_return'] = float((close[-1] - close[0]) / close[0])
         
         return stats
     
-    def _calculate_volatility(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_volatility(self, df: pd.DataFrame, close: np.ndarray, returns_std: Optional[float]) -> Dict[str, Any]:
         """Calculate volatility metrics."""
-        if len(df) < 2 or 'close' not in df.columns:
+        if len(df) < 2 or close is None:
             return {}
         
         volatility = {}
         
-        # Daily returns
-        df_temp = df.copy()
-        df_temp['return'] = df_temp['close'].pct_change()
-        
         # Daily volatility (standard deviation of returns)
-        volatility['daily'] = float(df_temp['return'].std())
+        volatility['daily'] = float(returns_std)
         
         # Annualized volatility (assuming 252 trading days per year)
-        volatility['annualized'] = float(df_temp['return'].std() * np.sqrt(252))
+        volatility['annualized'] = float(returns_std * np.sqrt(252))
         
         # Average True Range (ATR) for 14 days
         if all(col in df.columns for col in ['high', 'low', 'close']):
-            df_temp['previous_close'] = df_temp['close'].shift(1)
-            df_temp['tr1'] = df_temp['high'] - df_temp['low']
-            df_temp['tr2'] = abs(df_temp['high'] - df_temp['previous_close'])
-            df_temp['tr3'] = abs(df_temp['low'] - df_temp['previous_close'])
-            df_temp['true_range'] = df_temp[['tr1', 'tr2', 'tr3']].max(axis=1)
-            volatility['atr_14'] = float(df_temp['true_range'].rolling(window=14).mean().iloc[-1]) if len(df_temp) >= 14 else None
+            high = df['high'].to_numpy(dtype=np.float64)
+            low = df['low'].to_numpy(dtype=np.float64)
+            previous_close = np.empty_like(close)
+            previous_close[0] = np.nan
+            previous_close[1:] = close[:-1]
+            
+            # fmax ignores the missing previous close on the first row, like DataFrame.max(axis=1)
+            true_range = np.fmax.reduce([high - low, np.abs(high - previous_close), np.abs(low - previous_close)])
+            
+            # Only the latest 14-day average is reported
+            volatility['atr_14'] = float(true_range[-14:].mean()) if len(df) >= 14 else None
         
         return volatility
     
-    def _detect_trends(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _detect_trends(self, timestamps: np.ndarray, close: np.ndarray, rolling: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, Any]:
         """Detect trends in the data."""
-        if len(df) < 20 or 'close' not in df.columns:
+        if close is None or 20 not in rolling:
             return {}
         
         trends = {}
         
-        # Compute moving averages
-        df_temp = df.copy()
-        df_temp['sma_20'] = df_temp['close'].rolling(window=20).mean()
-        if len(df) >= 50:
-            df_temp['sma_50'] = df_temp['close'].rolling(window=50).mean()
+        # Moving averages from the batch's rolling statistics (only the latest values are needed)
+        last_close = close[-1]
+        sma_20 = rolling[20][0][-1]
+        sma_50 = rolling[50][0][-1] if 50 in rolling else np.nan
         
         # Determine current trend based on price vs. moving averages
-        last_row = df_temp.iloc[-1]
-        if len(df_temp) >= 50 and not pd.isna(last_row.get('sma_50')):
-            if last_row['close'] > last_row['sma_20'] and last_row['sma_20'] > last_row['sma_50']:
+        if not np.isnan(sma_50):
+            if last_close > sma_20 and sma_20 > sma_50:
                 trends['current'] = 'bullish'
-            elif last_row['close'] < last_row['sma_20'] and last_row['sma_20'] < last_row['sma_50']:
+            elif last_close < sma_20 and sma_20 < sma_50:
                 trends['current'] = 'bearish'
             else:
                 trends['current'] = 'sideways'
             
             # Calculate trend strength
-            trend_strength = abs(last_row['close'] - last_row['sma_50']) / last_row['sma_50']
+            trend_strength = abs(last_close - sma_50) / sma_50
             trends['strength'] = float(trend_strength)
-        elif len(df_temp) >= 20:
-            if last_row['close'] > last_row['sma_20']:
+        else:
+            if last_close > sma_20:
                 trends['current'] = 'bullish'
-            elif last_row['close'] < last_row['sma_20']:
+            elif last_close < sma_20:
                 trends['current'] = 'bearish'
             else:
                 trends['current'] = 'sideways'
                 
             # Calculate trend strength with SMA20
-            trend_strength = abs(last_row['close'] - last_row['sma_20']) / last_row['sma_20']
+            trend_strength = abs(last_close - sma_20) / sma_20
             trends['strength'] = float(trend_strength)
         
         # Identify support and resistance levels
-        if len(df) >= 30:
-            pivots = self._find_pivot_points(df_temp)
+        if len(close) >= 30:
+            pivots = self._find_pivot_points(timestamps, close)
             supports = [p for p in pivots if p['type'] == 'support']
             resistances = [p for p in pivots if p['type'] == 'resistance']
             
@@ -381,47 +391,22 @@ class PandasDataProcessingService(DataProcessingService):
         
         return trends
     
-    def _find_pivot_points(self, df: pd.DataFrame, window: int = 5) -> List[Dict[str, Any]]:
+    def _find_pivot_points(self, timestamps: np.ndarray, close: np.ndarray, window: int = 5) -> List[Dict[str, Any]]:
         """Find pivot points (support and resistance) in the price data."""
-        if len(df) < window * 2 + 1 or 'close' not in df.columns or 'timestamp' not in df.columns:
+        if close is None or timestamps is None or len(close) < window * 2 + 1:
             return []
         
-        pivots = []
-        
-        for i in range(window, len(df) - window):
-            is_pivot_high = True
-            is_pivot_low = True
-            
-            # Check if this is a pivot high
-            for j in range(i - window, i + window + 1):
-                if j == i:
-                    continue
-                
-                if df['close'].iloc[j] > df['close'].iloc[i]:
-                    is_pivot_high = False
-                    break
-            
-            # Check if this is a pivot low
-            for j in range(i - window, i + window + 1):
-                if j == i:
-                    continue
-                
-                if df['close'].iloc[j] < df['close'].iloc[i]:
-                    is_pivot_low = False
-                    break
-            
-            # Record pivot point
-            if is_pivot_high:
-                pivots.append({
-                    'timestamp': df['timestamp'].iloc[i].isoformat() if isinstance(df['timestamp'].iloc[i], datetime) else df['timestamp'].iloc[i],
-                    'price': float(df['close'].iloc[i]),
-                    'type': 'resistance'
-                })
-            elif is_pivot_low:
-                pivots.append({
-                    'timestamp': df['timestamp'].iloc[i].isoformat() if isinstance(df['timestamp'].iloc[i], datetime) else df['timestamp'].iloc[i],
-                    'price': float(df['close'].iloc[i]),
-                    'type': 'support'
-                })
+        # A pivot high/low is the max/min of the `window` prices on each side of it
+        is_high, is_low = indicator_kernels.pivot_flags(close, window)
+        prices = close.tolist()
+        
+        pivots = [
+            {
+                'timestamp': timestamps[i],
+                'price': prices[i],
+                'type': 'resistance' if is_high[i] else 'support'
+            }
+            for i in np.flatnonzero(is_high | is_low).tolist()
+        ]
         
         return pivots
\ No newline at end of file
@@ -1,12 +1,48 @@
 # src/infrastructure/services/simple_data_masking_service.py
+import functools
 import logging
 import hashlib
 import re
-from typing import Dict, Any, List, Union
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 
 from src.domain.interfaces.repositories import DataMaskingService
 
 
+# Patterns compiled once at import time
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+INDEXED_FIELD_PATTERN = re.compile(r"(.*)\[(\d+)\]")
+PHONE_SEPARATORS_PATTERN = re.compile(r"[\s\-\(\)\.]")
+NUMBER_SEPARATORS_PATTERN = re.compile(r"[\s\-]")
+
+# Separators kept in place when masking, and the characters that get masked
+PHONE_SEPARATORS = " -()."
+NUMBER_SEPARATORS = " -"
+PHONE_MASKABLE_PATTERN = re.compile(r"[^ \-().]")
+NUMBER_MASKABLE_PATTERN = re.compile(r"[^ \-]")
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_field_spec(field_spec: str) -> Tuple[Tuple[Tuple[str, Optional[int]], ...], str]:
+    """Split a field_name[:rule] spec into its (name, list index) path parts and rule."""
+    # Parse field specification (can be field_name or field_name:rule)
+    if ":" in field_spec:
+        field_path, rule = field_spec.split(":", 1)
+    else:
+        field_path, rule = field_spec, "default"
+    
+    # Support for nested fields (using dot notation) and list index notation (field[0])
+    parts = []
+    for part in field_path.split("."):
+        match = INDEXED_FIELD_PATTERN.match(part)
+        if match:
+            field_name, index = match.groups()
+            parts.append((field_name, int(index)))
+        else:
+            parts.append((part, None))
+    
+    return tuple(parts), rule
+
+
 class SimpleDataMaskingService(DataMaskingService):
     """Simple implementation of DataMaskingService for masking sensitive data."""
     
@@ -15,6 +51,7 @@ class SimpleDataMaskingService(DataMaskingService):
         # Salt for hashing. If not provided, a static salt is used.
         # In production, this should be a secure secret.
         self.salt = salt or "financial-market-data-masking-salt"
+        self._salt_bytes = self.salt.encode()
         
         # Default masking rules
         self.default_masking_rules = {
@@ -26,6 +63,13 @@ class SimpleDataMaskingService(DataMaskingService):
             "name": self._mask_name,
             "hash": self._hash_value
         }
+        
+        # Every rule name resolved with a single lookup (unknown rules fall back to partial masking)
+        self._rule_table = {
+            "default": self._mask_by_content,
+            "remove": self._remove_value,
+            **self.default_masking_rules
+        }
     
     def mask_sensitive_data(self, data: Dict[str, Any], fields_to_mask: List[str]) -> Dict[str, Any]:
         """Mask sensitive data fields."""
@@ -36,14 +80,11 @@ class SimpleDataMaskingService(DataMaskingService):
             result = data.copy()
             
             for field_spec in fields_to_mask:
-                # Parse field specification (can be field_name or field_name:rule)
-                if ":" in field_spec:
-                    field_name, rule = field_spec.split(":", 1)
-                else:
-                    field_name, rule = field_spec, "default"
+                # Field specs repeat across records, so their parsed form is cached
+                parts, rule = _parse_field_spec(field_spec)
                 
                 # Apply masking to the field
-                self._apply_masking(result, field_name, rule)
+                self._apply_masking(result, parts, rule)
             
             return result
             
@@ -52,117 +93,95 @@ class SimpleDataMaskingService(DataMaskingService):
             # Return original data if masking fails to avoid data loss
             return data
     
-    def _apply_masking(self, data: Dict[str, Any], field_path: str, rule: str) -> None:
+    def _apply_masking(self, data: Dict[str, Any], parts: Tuple[Tuple[str, Optional[int]], ...], rule: str) -> None:
         """Apply masking to a specific field in the data dict."""
-        # Support for nested fields (using dot notation)
-        parts = field_path.split(".")
-        
         # Navigate to the parent object
         current = data
-        for i in range(len(parts) - 1):
-            part = parts[i]
+        for field_name, index in parts[:-1]:
+            if field_name not in current:
+                return  # Field doesn't exist
             
-            # Handle list index notation (field[0])
-            match = re.match(r"(.*)\[(\d+)\]", part)
-            if match:
-                field_name, index = match.groups()
-                index = int(index)
-                
-                if field_name not in current:
-                    return  # Field doesn't exist
-                
-                if not isinstance(current[field_name], list) or index >= len(current[field_name]):
-                    return  # Index out of range
-                
-                current = current[field_name][index]
+            if index is None:
+                current = current[field_name]
+            elif not isinstance(current[field_name], list) or index >= len(current[field_name]):
+                return  # Index out of range
             else:
-                if part not in current:
-                    return  # Field doesn't exist
-                
-                current = current[part]
+                current = current[field_name][index]
         
         # Get the actual field name (last part)
-        field = parts[-1]
+        field_name, index = parts[-1]
         
-        # Handle list index notation in the final field
-        match = re.match(r"(.*)\[(\d+)\]", field)
-        if match:
-            field_name, index = match.groups()
-            index = int(index)
-            
-            if field_name not in current:
-                return  # Field doesn't exist
-            
-            if not isinstance(current[field_name], list) or index >= len(current[field_name]):
-                return  # Index out of range
-            
-            # Apply masking rule
+        if field_name not in current:
+            return  # Field doesn't exist
+        
+        # Apply masking rule
+        if index is None:
+            current[field_name] = self._apply_masking_rule(current[field_name], rule)
+        elif isinstance(current[field_name], list) and index < len(current[field_name]):
             current[field_name][index] = self._apply_masking_rule(current[field_name][index], rule)
-        else:
-            if field not in current:
-                return  # Field doesn't exist
-            
-            # Apply masking rule
-            current[field] = self._apply_masking_rule(current[field], rule)
     
     def _apply_masking_rule(self, value: Any, rule: str) -> Any:
         """Apply a specific masking rule to a value."""
+        # Resolve the rule once (unknown rules fall back to partial masking), not once per nested item
+        return self._mask_value(value, self._rule_table.get(rule, self._mask_partial))
+    
+    def _mask_value(self, value: Any, mask: Callable[[str], str]) -> Any:
+        """Apply a resolved masking function to a value, recursing into lists and dicts."""
         # Skip None values
         if value is None:
             return None
         
-        # Handle different data types
+        if isinstance(value, str):
+            return mask(value)
+        
+        # Handle different data types (lists of strings are masked without recursing per item)
         if isinstance(value, (list, tuple)):
-            return [self._apply_masking_rule(item, rule) for item in value]
+            return [mask(item) if isinstance(item, str) else self._mask_value(item, mask) for item in value]
         
         if isinstance(value, dict):
-            return {k: self._apply_masking_rule(v, rule) for k, v in value.items()}
+            return {k: self._mask_value(v, mask) for k, v in value.items()}
         
         # Convert to string for masking
-        value_str = str(value)
-        
-        # Apply rule
-        if rule == "default":
-            # Choose rule based on field content
-            if self._looks_like_email(value_str):
-                return self._mask_email(value_str)
-            elif self._looks_like_phone(value_str):
-                return self._mask_phone(value_str)
-            elif self._looks_like_credit_card(value_str):
-                return self._mask_credit_card(value_str)
-            elif self._looks_like_ssn(value_str):
-                return self._mask_ssn(value_str)
-            else:
-                # Default to partial masking for unknown types
-                return self._mask_partial(value_str)
-        elif rule in self.default_masking_rules:
-            return self.default_masking_rules[rule](value_str)
-        elif rule == "remove":
-            return "[REMOVED]"
+        return mask(str(value))
+    
+    def _mask_by_content(self, value: str) -> str:
+        """Choose the masking rule based on what the value looks like."""
+        if self._looks_like_email(value):
+            return self._mask_email(value)
+        elif self._looks_like_phone(value):
+            return self._mask_phone(value)
+        elif self._looks_like_credit_card(value):
+            return self._mask_credit_card(value)
+        elif self._looks_like_ssn(value):
+            return self._mask_ssn(value)
         else:
-            # Default to partial masking for unknown rules
-            return self._mask_partial(value_str)
+            # Default to partial masking for unknown types
+            return self._mask_partial(value)
+    
+    def _remove_value(self, value: str) -> str:
+        """Replace a value entirely."""
+        return "[REMOVED]"
     
     def _looks_like_email(self, value: str) -> bool:
         """Check if a value looks like an email."""
-        return re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", value) is not None
+        return EMAIL_PATTERN.match(value) is not None
     
     def _looks_like_phone(self, value: str) -> bool:
         """Check if a value looks like a phone number."""
         # Remove common phone number separators
-        clean_value = re.sub(r"[\s\-\(\)\.]", "", value)
+        clean_value = PHONE_SEPARATORS_PATTERN.sub("", value)
         return clean_value.isdigit() and 7 <= len(clean_value) <= 15
     
     def _looks_like_credit_card(self, value: str) -> bool:
         """Check if a value looks like a credit card number."""
         # Remove spaces and dashes
-        clean_value = re.sub(r"[\s\-]", "", value)
+        clean_value = NUMBER_SEPARATORS_PATTERN.sub("", value)
         return clean_value.isdigit() and 13 <= len(clean_value) <= 19
     
     def _looks_like_ssn(self, value: str) -> bool:
         """Check if a value looks like a US Social Security Number."""
         # Remove dashes
-        clean_value = re.sub(r"[\s\-]", "", value)
+        clean_value = NUMBER_SEPARATORS_PATTERN.sub("", value)
         return clean_value.isdigit() and len(clean_value) == 9
     
     def _mask_email(self, value: str) -> str:
@@ -181,84 +200,34 @@ class SimpleDataMaskingService(DataMaskingService):
     
     def _mask_phone(self, value: str) -> str:
         """Mask a phone number."""
-        # Remove common phone number separators
-        clean_value = re.sub(r"[\s\-\(\)\.]", "", value)
-        
-        if len(clean_value) <= 4:
-            return "*" * len(value)
-        
-        # Keep the last 4 digits, mask the rest
-        masked = "*" * (len(clean_value) - 4) + clean_value[-4:]
-        
-        # Try to preserve original format
-        if len(masked) == len(clean_value):
-            result = ""
-            clean_index = 0
-            
-            for char in value:
-                if char in " -().":
-                    result += char
-                else:
-                    result += masked[clean_index]
-                    clean_index += 1
-            
-            return result
-        
-        return masked
+        return self._mask_keep_last_four(value, PHONE_SEPARATORS_PATTERN, PHONE_MASKABLE_PATTERN, PHONE_SEPARATORS)
     
     def _mask_credit_card(self, value: str) -> str:
         """Mask a credit card number."""
-        # Remove spaces and dashes
-        clean_value = re.sub(r"[\s\-]", "", value)
-        
-        if len(clean_value) <= 4:
-            return "*" * len(value)
-        
-        # Keep the last 4 digits, mask the rest
-        masked = "*" * (len(clean_value) - 4) + clean_value[-4:]
-        
-        # Try to preserve original format
-        if len(masked) == len(clean_value):
-            result = ""
-            clean_index = 0
-            
-            for char in value:
-                if char in " -":
-                    result += char
-                else:
-                    result += masked[clean_index]
-                    clean_index += 1
-            
-            return result
-        
-        return masked
+        return self._mask_keep_last_four(value, NUMBER_SEPARATORS_PATTERN, NUMBER_MASKABLE_PATTERN, NUMBER_SEPARATORS)
     
     def _mask_ssn(self, value: str) -> str:
         """Mask a Social Security Number."""
-        # Remove dashes
-        clean_value = re.sub(r"[\s\-]", "", value)
+        return self._mask_keep_last_four(value, NUMBER_SEPARATORS_PATTERN, NUMBER_MASKABLE_PATTERN, NUMBER_SEPARATORS)
+    
+    def _mask_keep_last_four(self, value: str, separators_pattern: re.Pattern,
+                             maskable_pattern: re.Pattern, separators: str) -> str:
+        """Mask all but the last 4 characters of a number, preserving its separators."""
+        clean_value = separators_pattern.sub("", value)
         
         if len(clean_value) <= 4:
             return "*" * len(value)
         
-        # Keep the last 4 digits, mask the rest
-        masked = "*" * (len(clean_value) - 4) + clean_value[-4:]
-        
-        # Try to preserve original format
-        if len(masked) == len(clean_value):
-            result = ""
-            clean_index = 0
-            
-            for char in value:
-                if char in " -":
-                    result += char
-                else:
-                    result += masked[clean_index]
-                    clean_index += 1
-            
-            return result
+        # Find where the last 4 non-separator characters start
+        kept = 0
+        cut = len(value)
+        while kept < 4 and cut > 0:
+            cut -= 1
+            if value[cut] not in separators:
+                kept += 1
         
-        return masked
+        # Mask everything before that point, keeping separators in place
+        return maskable_pattern.sub("*", value[:cut]) + value[cut:]
     
     def _mask_personal_id(self, value: str) -> str:
         """Mask a personal ID (passport, driver's license, etc.)."""
@@ -292,6 +261,5 @@ class SimpleDataMaskingService(DataMaskingService):
     
     def _hash_value(self, value: str) -> str:
         """Hash a value."""
-        # Add salt and hash
-        salted = f"{value}{self.salt}"
-        return hashlib.sha256(salted.encode()).hexdigest()
\ No newline at end of file
+        # Add salt and hash (same digest as hashing f"{value}{salt}")
+        return hashlib.sha256(value.encode() + self._salt_bytes).hexdigest()
\ No newline at end of file
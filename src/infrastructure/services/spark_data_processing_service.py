@@ -1,23 +1,125 @@
 # src/infrastructure/services/spark_data_processing_service.py
 import logging
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import Iterator, List, Dict, Any, Optional
 from datetime import datetime
 
 from pyspark.sql import SparkSession
+import pyspark.sql.functions as F
+from pyspark.sql.window import Window
 from pyspark.sql.functions import col, udf, window, avg, stddev, lag, expr, max as spark_max, min as spark_min
 from pyspark.sql.types import DoubleType, StringType, StructType, StructField, TimestampType, IntegerType
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
-from src.domain.interfaces.services import DataProcessingService
+from src.domain.interfaces.services import DataProcessingService, IndicatorSeries
+from src.infrastructure.config.settings import Settings
+from src.infrastructure.services import indicator_kernels
+from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
+
+
+# Schema of the batch records, defined once for better performance
+_OHLCV_SCHEMA = StructType([
+    StructField("timestamp", TimestampType(), True),
+    StructField("open", DoubleType(), True),
+    StructField("high", DoubleType(), True),
+    StructField("low", DoubleType(), True),
+    StructField("close", DoubleType(), True),
+    StructField("volume", IntegerType(), True),
+    StructField("adjusted_close", DoubleType(), True)
+])
+
+# Window-function indicators added to the batch DataFrame (see _with_window_columns)
+SMA_WINDOWS = (5, 20, 50)
+RSI_WINDOW = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_STD_DEV = 2
+
+# Exponential indicators computed on the executors (see _with_ewm_columns)
+EMA_WINDOWS = (5, 20)
+MACD_PERIODS = (12, 26, 9)
+EWM_COLUMNS = [f"ema_{window}" for window in EMA_WINDOWS] + ["macd", "signal", "histogram"]
+
+
+def _add_ewm_columns(batches: Iterator[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+    """Add the EMA and MACD columns to the whole (single-partition) batch, straight from its Arrow record batches."""
+    batches = list(batches)
+    if not batches:
+        return
+    
+    # The recursions need the complete ordered series, so the partition's batches are joined first
+    table = pa.Table.from_batches(batches).sort_by("timestamp")
+    close = table.column("close").to_numpy()
+    
+    columns = {f"ema_{window}": indicator_kernels.ema(close, window) for window in EMA_WINDOWS}
+    columns["macd"], columns["signal"], columns["histogram"] = indicator_kernels.macd(close, *MACD_PERIODS)
+    for name, values in columns.items():
+        table = table.append_column(name, pa.array(values))
+    
+    yield from table.to_batches()
+
+
+@dataclass
+class IndicatorCache:
+    """Price arrays of a collected batch and the series derived from them, computed once and
+    shared by the statistics, volatility and trend calculations."""
+    close: np.ndarray
+    high: Optional[np.ndarray]
+    low: Optional[np.ndarray]
+    returns: Optional[np.ndarray]
+    returns_std: Optional[float]
+    sma20: np.ndarray
+    sma50: np.ndarray
+    true_range: Optional[np.ndarray]
+    atr14: Optional[float]
+    
+    @classmethod
+    def from_pandas(cls, pdf: pd.DataFrame) -> 'IndicatorCache':
+        """Build the cache from the batch collected with its indicator columns."""
+        close = pdf['close'].to_numpy(dtype=np.float64)
+        returns = PandasDataProcessingService._daily_returns(close)
+        
+        high = low = true_range = atr14 = None
+        if 'high' in pdf.columns and 'low' in pdf.columns:
+            high = pdf['high'].to_numpy(dtype=np.float64)
+            low = pdf['low'].to_numpy(dtype=np.float64)
+            
+            previous_close = np.empty_like(close)
+            previous_close[0] = np.nan
+            previous_close[1:] = close[:-1]
+            
+            # fmax ignores the missing previous close on the first row, like DataFrame.max(axis=1)
+            true_range = np.fmax.reduce([high - low, np.abs(high - previous_close), np.abs(low - previous_close)])
+            
+            # Only the latest 14-period average is reported
+            if len(true_range) >= 14:
+                atr14 = float(true_range[-14:].mean())
+        
+        return cls(
+            close=close,
+            high=high,
+            low=low,
+            returns=returns,
+            returns_std=PandasDataProcessingService._returns_std(returns),
+            sma20=pdf['sma_20'].to_numpy(dtype=np.float64),
+            sma50=pdf['sma_50'].to_numpy(dtype=np.float64),
+            true_range=true_range,
+            atr14=atr14
+        )
 
 
 class SparkDataProcessingService(DataProcessingService):
     """Implementation of DataProcessingService using Apache Spark for scalable financial data analysis."""
     
-    def __init__(self, spark_session=None):
+    # Batches smaller than this are processed in-process with pandas; Spark job
+    # scheduling and the JVM round-trips would dominate their processing time
+    SPARK_THRESHOLD = 50000
+    
+    def __init__(self, spark_session=None, pandas_service: PandasDataProcessingService = None):
         self.logger = logging.getLogger(__name__)
         self.spark = spark_session or self._create_spark_session()
+        self.pandas_service = pandas_service or PandasDataProcessingService()
     
     def _create_spark_session(self):
         """Create a Spark session."""
@@ -26,6 +128,8 @@ class SparkDataProcessingService(DataProcessingService):
                 .appName("FinancialMarketAnalysis") \
                 .config("spark.sql.session.timeZone", "UTC") \
                 .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+                .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "true") \
+                .config("spark.sql.execution.arrow.maxRecordsPerBatch", str(Settings.SPARK_ARROW_MAX_RECORDS_PER_BATCH)) \
                 .config("spark.driver.memory", "4g") \
                 .config("spark.executor.memory", "4g") \
                 .getOrCreate()
@@ -36,76 +140,79 @@ class SparkDataProcessingService(DataProcessingService):
                 .appName("FinancialMarketAnalysis") \
                 .master("local[*]") \
                 .config("spark.sql.session.timeZone", "UTC") \
+                .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+                .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "true") \
+                .config("spark.sql.execution.arrow.maxRecordsPerBatch", str(Settings.SPARK_ARROW_MAX_RECORDS_PER_BATCH)) \
                 .getOrCreate()
     
     def process_batch_data(self, batch_id: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Process a batch of data to calculate technical indicators."""
+        if len(data) < self.SPARK_THRESHOLD:
+            return self.pandas_service.process_batch_data(batch_id, data)
+        
+        df = None
         try:
             self.logger.info(f"Processing batch {batch_id} with {len(data)} records using Spark")
             
-            # Define schema for better performance
-            schema = StructType([
-                StructField("timestamp", TimestampType(), True),
-                StructField("open", DoubleType(), True),
-                StructField("high", DoubleType(), True),
-                StructField("low", DoubleType(), True),
-                StructField("close", DoubleType(), True),
-                StructField("volume", IntegerType(), True),
-                StructField("adjusted_close", DoubleType(), True)
-            ])
-            
-            # Handle timestamp conversion in data
-            for record in data:
-                if isinstance(record.get('timestamp'), str):
-                    try:
-                        record['timestamp'] = datetime.fromisoformat(record['timestamp'].replace('Z', '+00:00'))
-                    except (ValueError, AttributeError):
-                        pass
-            
-            # Convert data to Spark DataFrame
+            # Convert data to Spark DataFrame (ISO timestamp strings parsed in one vectorized call;
+            # the session time zone is UTC)
             df_pd = pd.DataFrame(data)
-            df = self.spark.createDataFrame(df_pd, schema=schema)
+            if 'timestamp' in df_pd.columns:
+                df_pd['timestamp'] = pd.to_datetime(df_pd['timestamp'], format='ISO8601', utc=True, errors='coerce')
+            df = self.spark.createDataFrame(df_pd, schema=_OHLCV_SCHEMA)
+            
+            # Ensure timestamp column is sorted; cached because every indicator scans it again
+            df = df.orderBy("timestamp").cache()
+            
+            # The batch is already in memory, so its size needs no Spark job
+            n = len(data)
+            
+            # Every indicator column is added to one DataFrame and collected with a single action
+            # (one Arrow transfer, also shared by the indicators computed with pandas)
+            enriched = self._with_ewm_columns(self._with_window_columns(df))
+            pdf = enriched.orderBy("timestamp").toPandas()
+            timestamps = np.array(PandasDataProcessingService._format_timestamps(pdf['timestamp']), dtype=object)
             
-            # Ensure timestamp column is sorted
-            df = df.orderBy("timestamp")
+            # Prices, returns, moving averages and true range shared by the statistics, volatility and trends
+            cache = IndicatorCache.from_pandas(pdf)
             
             # Calculate technical indicators
             result = {}
             
             # Moving Averages
-            if df.count() >= 5:
-                result['sma_5'] = self._calculate_sma(df, 5)
-            if df.count() >= 20:
-                result['sma_20'] = self._calculate_sma(df, 20)
-            if df.count() >= 50:
-                result['sma_50'] = self._calculate_sma(df, 50)
-            if df.count() >= 5:
-                result['ema_5'] = self._calculate_ema(df, 5)
-            if df.count() >= 20:
-                result['ema_20'] = self._calculate_ema(df, 20)
+            if n >= 5:
+                result['sma_5'] = self._calculate_sma(pdf, timestamps, 5)
+            if n >= 20:
+                result['sma_20'] = self._calculate_sma(pdf, timestamps, 20)
+            if n >= 50:
+                result['sma_50'] = self._calculate_sma(pdf, timestamps, 50)
+            if n >= 5:
+                result['ema_5'] = self._calculate_ema(pdf, timestamps, 5)
+            if n >= 20:
+                result['ema_20'] = self._calculate_ema(pdf, timestamps, 20)
             
             # Relative Strength Index
-            if df.count() >= 14:
-                result['rsi_14'] = self._calculate_rsi(df, 14)
+            if n >= 14:
+                result['rsi_14'] = self._calculate_rsi(pdf, timestamps)
             
             # Bollinger Bands
-            if df.count() >= 20:
-                result['bollinger_bands'] = self._calculate_bollinger_bands(df, 20, 2)
+            if n >= 20:
+                result['bollinger_bands'] = self._calculate_bollinger_bands(pdf, timestamps)
             
             # MACD
-            if df.count() >= 26:
-                result['macd'] = self._calculate_macd(df, 12, 26, 9)
+            if n >= 26:
+                result['macd'] = self._calculate_macd(pdf, timestamps)
             
             # Basic Statistics
-            result['statistics'] = self._calculate_statistics(df)
+            result['statistics'] = self._calculate_statistics(df, cache, n)
             
             # Volatility
-            if df.count() >= 2:
-                result['volatility'] = self._calculate_volatility(df)
+            if n >= 2:
+                result['volatility'] = self._calculate_volatility(cache)
             
             # Trends
-            if df.count() >= 20:
-                result['trends'] = self._detect_trends(df)
+            if n >= 20:
+                result['trends'] = self._detect_trends(cache)
             
             return result
             
@@ -115,7 +222,8 @@ class SparkDataProcessingService(DataProcessingService):
             return {"error": str(e)}
         finally:
             # Don't stop the SparkSession as it's expensive to recreate
-            pass
+            if df is not None:
+                df.unpersist()
     
     def process_stream_data(self, stream_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process streaming data."""
@@ -146,237 +254,128 @@ class SparkDataProcessingService(DataProcessingService):
             self.logger.error(f"Error processing stream data: {str(e)}")
             return None
     
-    def _calculate_sma(self, df, window: int) -> List[Dict[str, Any]]:
-        """Calculate Simple Moving Average using Spark window functions."""
+    def _with_window_columns(self, df):
+        """Add the SMA, RSI and Bollinger Bands columns as Spark window expressions."""
+        ordered = Window.orderBy("timestamp")
+        
+        def trailing(window: int):
+            return ordered.rowsBetween(-(window - 1), 0)
+        
+        def full_window(column: str, window: int, value):
+            # Null until the window holds `window` values, like the pandas rolling kernels
+            return F.when(F.count(column).over(trailing(window)) == window, value)
+        
+        # Price changes (a window function can't be nested in another, so this is its own projection)
+        changes_df = df.select("*", (F.col("close") - F.lag("close", 1).over(ordered)).alias("change"))
+        
+        # Moving averages, band statistics and average gains/losses in a single projection
+        gain = F.when(F.col("change") > 0, F.col("change")).otherwise(0)
+        loss = F.when(F.col("change") < 0, -F.col("change")).otherwise(0)
+        averages_df = changes_df.select(
+            *df.columns,
+            *[
+                full_window("close", window, F.avg("close").over(trailing(window))).alias(f"sma_{window}")
+                for window in SMA_WINDOWS
+            ],
+            full_window("close", BOLLINGER_WINDOW, F.avg("close").over(trailing(BOLLINGER_WINDOW))).alias("bb_middle"),
+            full_window("close", BOLLINGER_WINDOW, F.stddev("close").over(trailing(BOLLINGER_WINDOW))).alias("bb_std"),
+            full_window("change", RSI_WINDOW, F.avg(gain).over(trailing(RSI_WINDOW))).alias("avg_gain"),
+            full_window("change", RSI_WINDOW, F.avg(loss).over(trailing(RSI_WINDOW))).alias("avg_loss")
+        )
+        
+        # Bands and RSI from the averages (RSI is undefined without losses in the window,
+        # as in indicator_kernels.rsi, so flat prices don't read as overbought)
+        rsi = F.when(F.col("avg_loss") != 0, 100 - (100 / (1 + F.col("avg_gain") / F.col("avg_loss"))))
+        return averages_df.select(
+            *df.columns,
+            *[f"sma_{window}" for window in SMA_WINDOWS],
+            (F.col("bb_middle") + F.col("bb_std") * BOLLINGER_STD_DEV).alias("bb_upper"),
+            "bb_middle",
+            (F.col("bb_middle") - F.col("bb_std") * BOLLINGER_STD_DEV).alias("bb_lower"),
+            rsi.cast(DoubleType()).alias(f"rsi_{RSI_WINDOW}")
+        )
+    
+    @staticmethod
+    def _to_series(pdf: pd.DataFrame, timestamps: np.ndarray, **columns: str) -> IndicatorSeries:
+        """Slice indicator columns of the collected batch, keeping the rows where all of them are defined."""
+        valid = pdf[list(columns.values())].notna().all(axis=1).to_numpy()
+        return {
+            'timestamp': timestamps[valid].tolist(),
+            **{name: pdf[column].to_numpy(dtype=np.float64)[valid].tolist() for name, column in columns.items()}
+        }
+    
+    def _calculate_sma(self, pdf: pd.DataFrame, timestamps: np.ndarray, window: int) -> IndicatorSeries:
+        """Calculate Simple Moving Average (computed by _with_window_columns)."""
         try:
-            from pyspark.sql.window import Window
-            import pyspark.sql.functions as F
-            
-            # Define the window specification
-            windowSpec = Window.orderBy("timestamp").rowsBetween(-(window-1), 0)
-            
-            # Calculate SMA
-            sma_df = df.withColumn(f"sma_{window}", F.avg("close").over(windowSpec))
-            
-            # Convert to list of dictionaries
-            result = []
-            
-            # Collect only necessary columns to minimize data transfer
-            rows = sma_df.select("timestamp", f"sma_{window}").collect()
-            
-            for row in rows:
-                if row[f"sma_{window}"] is not None:
-                    result.append({
-                        'timestamp': row['timestamp'].isoformat(),
-                        'value': float(row[f"sma_{window}"])
-                    })
-            
-            return result
+            return self._to_series(pdf, timestamps, value=f"sma_{window}")
         except Exception as e:
             self.logger.error(f"Error calculating SMA: {str(e)}")
-            return []
+            return {'timestamp': [], 'value': []}
     
-    def _calculate_ema(self, df, window: int) -> List[Dict[str, Any]]:
-        """Calculate Exponential Moving Average."""
+    def _with_ewm_columns(self, df):
+        """Add the EMA and MACD columns on an executor, reading the Arrow record batches without a pandas conversion."""
+        schema = StructType(df.schema.fields + [StructField(name, DoubleType(), True) for name in EWM_COLUMNS])
+        
+        # The recursions run over the whole ordered series, so the batch is kept in a single partition
+        return df.coalesce(1).mapInArrow(_add_ewm_columns, schema)
+    
+    def _calculate_ema(self, pdf: pd.DataFrame, timestamps: np.ndarray, window: int) -> IndicatorSeries:
+        """Calculate Exponential Moving Average (computed by _with_ewm_columns)."""
         try:
-            # EMA requires more complex calculation in Spark
-            # Converting to pandas for now - in production we would implement using Spark UDFs
-            pd_df = df.toPandas()
-            pd_df[f'ema_{window}'] = pd_df['close'].ewm(span=window, adjust=False).mean()
-            
-            # Convert back to result format
-            result = []
-            for idx, row in pd_df.iterrows():
-                if not pd.isna(row[f'ema_{window}']):
-                    result.append({
-                        'timestamp': row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp'],
-                        'value': float(row[f'ema_{window}'])
-                    })
-            
-            return result
+            return self._to_series(pdf, timestamps, value=f"ema_{window}")
         except Exception as e:
             self.logger.error(f"Error calculating EMA: {str(e)}")
-            return []
+            return {'timestamp': [], 'value': []}
     
-    def _calculate_rsi(self, df, window: int) -> List[Dict[str, Any]]:
-        """Calculate Relative Strength Index."""
+    def _calculate_rsi(self, pdf: pd.DataFrame, timestamps: np.ndarray) -> IndicatorSeries:
+        """Calculate Relative Strength Index (computed by _with_window_columns)."""
         try:
-            from pyspark.sql.window import Window
-            import pyspark.sql.functions as F
-            
-            # Define window specification for lag
-            windowSpec = Window.orderBy("timestamp")
-            
-            # Calculate price changes
-            rsi_df = df.withColumn("prev_close", F.lag("close", 1).over(windowSpec))
-            rsi_df = rsi_df.withColumn("change", F.col("close") - F.col("prev_close"))
-            
-            # Calculate gains and losses
-            rsi_df = rsi_df.withColumn("gain", F.when(F.col("change") > 0, F.col("change")).otherwise(0))
-            rsi_df = rsi_df.withColumn("loss", F.when(F.col("change") < 0, -F.col("change")).otherwise(0))
-            
-            # Define window for rolling averages
-            rollWindow = Window.orderBy("timestamp").rowsBetween(-(window-1), 0)
-            
-            # Calculate average gains and losses
-            rsi_df = rsi_df.withColumn("avg_gain", F.avg("gain").over(rollWindow))
-            rsi_df = rsi_df.withColumn("avg_loss", F.avg("loss").over(rollWindow))
-            
-            # Calculate RS and RSI
-            rsi_df = rsi_df.withColumn(
-                "rs", 
-                F.when(F.col("avg_loss") == 0, 100).otherwise(F.col("avg_gain") / F.col("avg_loss"))
-            )
-            rsi_df = rsi_df.withColumn(
-                "rsi", 
-                F.when(F.col("avg_loss") == 0, 100).otherwise(100 - (100 / (1 + F.col("rs"))))
-            )
-            
-            # Convert to list of dictionaries
-            result = []
-            rows = rsi_df.select("timestamp", "rsi").filter(F.col("rsi").isNotNull()).collect()
-            
-            for row in rows:
-                result.append({
-                    'timestamp': row['timestamp'].isoformat(),
-                    'value': float(row['rsi'])
-                })
-            
-            return result
+            return self._to_series(pdf, timestamps, value=f"rsi_{RSI_WINDOW}")
         except Exception as e:
             self.logger.error(f"Error calculating RSI: {str(e)}")
-            return []
+            return {'timestamp': [], 'value': []}
     
-    def _calculate_bollinger_bands(self, df, window: int, std_dev: float) -> Dict[str, List[Dict[str, Any]]]:
-        """Calculate Bollinger Bands."""
+    def _calculate_bollinger_bands(self, pdf: pd.DataFrame, timestamps: np.ndarray) -> IndicatorSeries:
+        """Calculate Bollinger Bands (computed by _with_window_columns)."""
         try:
-            from pyspark.sql.window import Window
-            import pyspark.sql.functions as F
-            
-            # Define window for calculations
-            windowSpec = Window.orderBy("timestamp").rowsBetween(-(window-1), 0)
-            
-            # Calculate middle band (SMA)
-            bb_df = df.withColumn("middle", F.avg("close").over(windowSpec))
-            
-            # Calculate standard deviation
-            bb_df = bb_df.withColumn("std", F.stddev("close").over(windowSpec))
-            
-            # Calculate upper and lower bands
-            bb_df = bb_df.withColumn("upper", F.col("middle") + (F.col("std") * std_dev))
-            bb_df = bb_df.withColumn("lower", F.col("middle") - (F.col("std") * std_dev))
-            
-            # Convert to dict of lists
-            result = {
-                'upper': [],
-                'middle': [],
-                'lower': []
-            }
-            
-            rows = bb_df.select("timestamp", "upper", "middle", "lower").filter(F.col("middle").isNotNull()).collect()
-            
-            for row in rows:
-                timestamp = row['timestamp'].isoformat()
-                
-                result['upper'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['upper'])
-                })
-                
-                result['middle'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['middle'])
-                })
-                
-                result['lower'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['lower'])
-                })
-            
-            return result
+            return self._to_series(pdf, timestamps, upper="bb_upper", middle="bb_middle", lower="bb_lower")
         except Exception as e:
             self.logger.error(f"Error calculating Bollinger Bands: {str(e)}")
-            return {'upper': [], 'middle': [], 'lower': []}
+            return {'timestamp': [], 'upper': [], 'middle': [], 'lower': []}
     
-    def _calculate_macd(self, df, fast_period: int, slow_period: int, signal_period: int) -> Dict[str, List[Dict[str, Any]]]:
-        """Calculate Moving Average Convergence Divergence."""
+    def _calculate_macd(self, pdf: pd.DataFrame, timestamps: np.ndarray) -> IndicatorSeries:
+        """Calculate Moving Average Convergence Divergence (computed by _with_ewm_columns)."""
         try:
-            # This calculation is more complex in Spark
-            # For the MVP, we'll convert to pandas, calculate, and convert back
-            pd_df = df.toPandas()
-            
-            # Calculate EMAs
-            pd_df['ema_fast'] = pd_df['close'].ewm(span=fast_period, adjust=False).mean()
-            pd_df['ema_slow'] = pd_df['close'].ewm(span=slow_period, adjust=False).mean()
-            
-            # Calculate MACD line
-            pd_df['macd'] = pd_df['ema_fast'] - pd_df['ema_slow']
-            
-            # Calculate signal line
-            pd_df['signal'] = pd_df['macd'].ewm(span=signal_period, adjust=False).mean()
-            
-            # Calculate histogram
-            pd_df['histogram'] = pd_df['macd'] - pd_df['signal']
-            
-            # Convert to dict of lists
-            result = {
-                'macd': [],
-                'signal': [],
-                'histogram': []
-            }
-            
-            for _, row in pd_df.dropna().iterrows():
-                timestamp = row['timestamp'].isoformat() if isinstance(row['timestamp'], datetime) else row['timestamp']
-                
-                result['macd'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['macd'])
-                })
-                
-                result['signal'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['signal'])
-                })
-                
-                result['histogram'].append({
-                    'timestamp': timestamp,
-                    'value': float(row['histogram'])
-                })
-            
-            return result
+            return self._to_series(pdf, timestamps, macd="macd", signal="signal", histogram="histogram")
         except Exception as e:
             self.logger.error(f"Error calculating MACD: {str(e)}")
-            return {'macd': [], 'signal': [], 'histogram': []}
+            return {'timestamp': [], 'macd': [], 'signal': [], 'histogram': []}
     
-    def _calculate_statistics(self, df) -> Dict[str, Any]:
+    def _calculate_statistics(self, df, cache: IndicatorCache, count: int) -> Dict[str, Any]:
         """Calculate basic statistics for the data."""
         try:
-            # Use Spark's built-in statistical functions
-            count = df.count()
-            
             if count == 0:
                 return {}
             
-            # Use Spark SQL for aggregate calculations
-            stats_df = df.agg(
+            # Use Spark SQL for aggregate calculations (price and volume in a single job)
+            agg_exprs = [
                 spark_min("timestamp").alias("start_date"),
                 spark_max("timestamp").alias("end_date"),
                 spark_min("close").alias("min_price"),
                 spark_max("close").alias("max_price"),
                 avg("close").alias("avg_price")
-            )
+            ]
             
-            if "volume" in df.columns:
-                volume_stats = df.agg(
+            has_volume = "volume" in df.columns
+            if has_volume:
+                agg_exprs += [
                     spark_min("volume").alias("min_volume"),
                     spark_max("volume").alias("max_volume"),
                     avg("volume").alias("avg_volume")
-                ).first()
-            else:
-                volume_stats = None
+                ]
             
             # Collect results
-            stats_row = stats_df.first()
+            stats_row = df.agg(*agg_exprs).first()
             
             stats = {
                 "start_date": stats_row["start_date"].isoformat(),
@@ -388,23 +387,19 @@ class SparkDataProcessingService(DataProcessingService):
             }
             
             # Add volume statistics if available
-            if volume_stats:
-                stats["min_volume"] = int(volume_stats["min_volume"])
-                stats["max_volume"] = int(volume_stats["max_volume"])
-                stats["avg_volume"] = float(volume_stats["avg_volume"])
+            if has_volume:
+                stats["min_volume"] = int(stats_row["min_volume"])
+                stats["max_volume"] = int(stats_row["max_volume"])
+                stats["avg_volume"] = float(stats_row["avg_volume"])
             
-            # Calculate returns
+            # Calculate returns from the close prices already collected with the indicators
+            # (no further Spark job or pandas copy)
             if count > 1:
-                # This requires pandas conversion for simplicity in MVP
-                pd_df = df.toPandas()
-                pd_df['return'] = pd_df['close'].pct_change()
+                valid_returns = cache.returns[~np.isnan(cache.returns)]
                 
-                first_price = pd_df['close'].iloc[0]
-                last_price = pd_df['close'].iloc[-1]
-                
-                stats['avg_daily_return'] = float(pd_df['return'].mean())
-                stats['std_daily_return'] = float(pd_df['return'].std())
-                stats['total_return'] = float((last_price - first_price) / first_price)
+                stats['avg_daily_return'] = float(valid_returns.mean()) if len(valid_returns) > 0 else float('nan')
+                stats['std_daily_return'] = cache.returns_std
+                stats['total_return'] = float((cache.close[-1] - cache.close[0]) / cache.close[0])
             
             return stats
             
@@ -412,34 +407,20 @@ class SparkDataProcessingService(DataProcessingService):
             self.logger.error(f"Error calculating statistics: {str(e)}")
             return {}
     
-    def _calculate_volatility(self, df) -> Dict[str, Any]:
+    def _calculate_volatility(self, cache: IndicatorCache) -> Dict[str, Any]:
         """Calculate volatility metrics."""
         try:
-            if df.count() < 2:
-                return {}
-            
-            # Convert to pandas for volatility calculations in MVP
-            pd_df = df.toPandas()
-            pd_df['return'] = pd_df['close'].pct_change()
-            
             volatility = {}
             
             # Daily volatility
-            volatility['daily'] = float(pd_df['return'].std())
+            volatility['daily'] = float(cache.returns_std)
             
             # Annualized volatility
-            volatility['annualized'] = float(pd_df['return'].std() * np.sqrt(252))
+            volatility['annualized'] = float(cache.returns_std * np.sqrt(252))
             
             # ATR calculation
-            if all(col in df.columns for col in ['high', 'low', 'close']):
-                pd_df['previous_close'] = pd_df['close'].shift(1)
-                pd_df['tr1'] = pd_df['high'] - pd_df['low']
-                pd_df['tr2'] = pd_df['high'] - pd_df['previous_close'].abs()
-                pd_df['tr3'] = pd_df['low'] - pd_df['previous_close'].abs()
-                pd_df['true_range'] = pd_df[['tr1', 'tr2', 'tr3']].max(axis=1)
-                
-                if len(pd_df) >= 14:
-                    volatility['atr_14'] = float(pd_df['true_range'].rolling(window=14).mean().iloc[-1])
+            if cache.atr14 is not None:
+                volatility['atr_14'] = cache.atr14
             
             return volatility
             
@@ -447,50 +428,41 @@ class SparkDataProcessingService(DataProcessingService):
             self.logger.error(f"Error calculating volatility: {str(e)}")
             return {}
     
-    def _detect_trends(self, df) -> Dict[str, Any]:
+    def _detect_trends(self, cache: IndicatorCache) -> Dict[str, Any]:
         """Detect trends in the data."""
         try:
-            if df.count() < 20:
-                return {}
-            
-            # Convert to pandas for trend detection in MVP
-            pd_df = df.toPandas()
-            
-            # Calculate moving averages
-            pd_df['sma_20'] = pd_df['close'].rolling(window=20).mean()
-            if len(pd_df) >= 50:
-                pd_df['sma_50'] = pd_df['close'].rolling(window=50).mean()
-            
             trends = {}
             
-            # Determine current trend
-            last_row = pd_df.iloc[-1]
+            # Determine current trend from the latest price and moving averages
+            last_close = cache.close[-1]
+            sma_20 = cache.sma20[-1]
+            sma_50 = cache.sma50[-1] if len(cache.close) >= 50 else np.nan
             
-            if len(pd_df) >= 50 and not pd.isna(last_row.get('sma_50')):
-                if last_row['close'] > last_row['sma_20'] and last_row['sma_20'] > last_row['sma_50']:
+            if not np.isnan(sma_50):
+                if last_close > sma_20 and sma_20 > sma_50:
                     trends['current'] = 'bullish'
-                elif last_row['close'] < last_row['sma_20'] and last_row['sma_20'] < last_row['sma_50']:
+                elif last_close < sma_20 and sma_20 < sma_50:
                     trends['current'] = 'bearish'
                 else:
                     trends['current'] = 'sideways'
                 
                 # Calculate trend strength
-                trend_strength = abs(last_row['close'] - last_row['sma_50']) / last_row['sma_50']
+                trend_strength = abs(last_close - sma_50) / sma_50
                 trends['strength'] = float(trend_strength)
-            elif len(pd_df) >= 20:
-                if last_row['close'] > last_row['sma_20']:
+            elif len(cache.close) >= 20:
+                if last_close > sma_20:
                     trends['current'] = 'bullish'
-                elif last_row['close'] < last_row['sma_20']:
+                elif last_close < sma_20:
                     trends['current'] = 'bearish'
                 else:
                     trends['current'] = 'sideways'
                     
                 # Calculate trend strength with SMA20
-                trend_strength = abs(last_row['close'] - last_row['sma_20']) / last_row['sma_20']
+                trend_strength = abs(last_close - sma_20) / sma_20
                 trends['strength'] = float(trend_strength)
             
             return trends
             
         except Exception as e:
             self.logger.error(f"Error detecting trends: {str(e)}")
-            return {}
\ No newline at end of file
+            return {}
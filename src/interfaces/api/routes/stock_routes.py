@@ -1,17 +1,45 @@
-from flask import Blueprint, request, jsonify
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from flask import Blueprint, Response, request
 from src.interfaces.factories.repository_factory import RepositoryFactory
 from src.application.use_cases.extract_stock_data import ExtractStockDataUseCase
 
 stock_bp = Blueprint('stock', __name__)
 
+# Pool da rota de vrios smbolos: cada smbolo espera pelo provedor de dados, ento as chamadas se sobrepem
+_executor = ThreadPoolExecutor(max_workers=8)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_use_case():
+    """Build the use case once per worker; its clients are reused across requests."""
+    market_data_service = RepositoryFactory.create_market_data_service()
+    return ExtractStockDataUseCase(market_data_service)
+
+
 @stock_bp.route('/<symbol>', methods=['GET'])
 def get_stock_data(symbol):
     # Implementao da rota
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    market_data_service = RepositoryFactory.create_market_data_service()
-    use_case = ExtractStockDataUseCase(market_data_service)
+    use_case = _get_use_case()
     
     data = use_case.execute(symbol, start_date, end_date)
-    return jsonify(data)
+    return Response(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC), mimetype='application/json')
+
+
+@stock_bp.route('/', methods=['GET'])
+def get_stocks_data():
+    # Vrios smbolos (?symbols=AAPL,MSFT) buscados em paralelo
+    symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    use_case = _get_use_case()
+    
+    futures = {symbol: _executor.submit(use_case.execute, symbol, start_date, end_date) for symbol in symbols}
+    data = {symbol: future.result() for symbol, future in futures.items()}
+    return Response(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC), mimetype='application/json')
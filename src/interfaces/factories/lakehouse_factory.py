@@ -1,4 +1,5 @@
 # src/interfaces/factories/lakehouse_factory.py
+import functools
 import logging
 import boto3
 
@@ -8,13 +9,21 @@ from src.application.use_cases.gold_layer import AggregateToGoldLayerUseCase
 from src.infrastructure.config.settings import Settings
 from src.infrastructure.services.aws_observability_service import AWSObservabilityService
 from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
-from src.infrastructure.services.spark_data_processing_service import SparkDataProcessingService
 
 logger = logging.getLogger(__name__)
 
 class LakehouseFactory:
     """Factory para criação de casos de uso relacionados ao Data Lakehouse."""
     
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def create_spark_processing_service():
+        """Cria (uma única vez) o serviço Spark; iniciar a JVM a cada chamada custa segundos."""
+        # Importado sob demanda: o PySpark só é carregado quando o Spark é usado
+        # (um ImportError sem PySpark instalado leva os chamadores ao Pandas)
+        from src.infrastructure.services.spark_data_processing_service import SparkDataProcessingService
+        return SparkDataProcessingService()
+    
     @staticmethod
     def create_bronze_use_case(settings=None, observability_service=None):
         """Cria o caso de uso para a camada bronze."""
@@ -36,7 +45,7 @@ class LakehouseFactory:
         if data_processing_service is None:
             try:
                 logger.info("Tentando criar serviço de processamento Spark")
-                data_processing_service = SparkDataProcessingService()
+                data_processing_service = LakehouseFactory.create_spark_processing_service()
             except Exception as e:
                 logger.warning(f"Não foi possível inicializar o Spark: {str(e)}. Usando Pandas.")
                 data_processing_service = PandasDataProcessingService()
@@ -76,7 +85,7 @@ class LakehouseFactory:
         # Escolher o serviço de processamento
         if use_spark:
             try:
-                data_processing_service = SparkDataProcessingService()
+                data_processing_service = LakehouseFactory.create_spark_processing_service()
             except Exception as e:
                 logger.warning(f"Não foi possível inicializar o Spark: {str(e)}. Usando Pandas.")
                 data_processing_service = PandasDataProcessingService()
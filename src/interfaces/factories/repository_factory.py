@@ -6,8 +6,8 @@ from src.infrastructure.adapters.alpha_vantage_adapter import AlphaVantageAdapte
 from src.infrastructure.services.aws_observability_service import AWSObservabilityService
 from src.infrastructure.services.simple_data_masking_service import SimpleDataMaskingService
 from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
-from src.infrastructure.services.spark_data_processing_service import SparkDataProcessingService
 from src.infrastructure.config.settings import Settings
+import functools
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,7 +15,11 @@ logger = logging.getLogger(__name__)
 class RepositoryFactory:
     """Factory for creating repository and service instances."""
     
+    # Settings, market data services and processing services are stateless and costly to build
+    # (boto3 clients, the Spark session), so one instance per argument set is shared
+    
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_settings():
         """Create Settings instance."""
         return Settings()
@@ -42,6 +46,7 @@ class RepositoryFactory:
             return S3MarketDataRepository(settings)
     
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def create_market_data_service(service_type='yahoo', settings=None):
         """Create a market data service instance."""
         settings = settings or RepositoryFactory.create_settings()
@@ -54,19 +59,55 @@ class RepositoryFactory:
     @staticmethod
     def create_data_processing_service(service_type='spark'):
         """Create a data processing service instance."""
-        logger.info(f"Criando serviço de processamento do tipo: {service_type}")
         try:
-            if service_type == 'pandas':
-                return PandasDataProcessingService()
-            elif service_type == 'spark':
-                return SparkDataProcessingService()
-            else:
-                # O padrão agora é Spark para melhor escalabilidade
-                logger.warning(f"Tipo de serviço '{service_type}' desconhecido, usando Spark como padrão")
-                return SparkDataProcessingService()
+            return RepositoryFactory._create_data_processing_service(service_type)
         except Exception as e:
+            # The fallback isn't cached, so a transient failure (e.g. the JVM failing to start)
+            # is retried on the next call instead of pinning the fallback for the process
             logger.error(f"Erro ao criar serviço de processamento {service_type}: {str(e)}")
-            logger.warning("Retornando para implementação Pandas devido a erro na inicialização do Spark")
+            return RepositoryFactory._create_fallback_processing_service()
+    
+    @staticmethod
+    def reset_data_processing_services():
+        """Drop the shared processing services, e.g. after stopping their Spark session."""
+        RepositoryFactory._create_data_processing_service.cache_clear()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _create_data_processing_service(service_type):
+        """Create the requested processing service; only successful creations are cached."""
+        logger.info(f"Criando serviço de processamento do tipo: {service_type}")
+        if service_type == 'pandas':
+            return PandasDataProcessingService()
+        elif service_type == 'spark':
+            return RepositoryFactory._create_spark_processing_service()
+        elif service_type == 'duckdb':
+            # DuckDB é opcional, então só é importado quando solicitado
+            from src.infrastructure.services.duckdb_data_processing_service import DuckDBDataProcessingService
+            return DuckDBDataProcessingService()
+        else:
+            # O padrão agora é Spark para melhor escalabilidade
+            logger.warning(f"Tipo de serviço '{service_type}' desconhecido, usando Spark como padrão")
+            return RepositoryFactory._create_spark_processing_service()
+    
+    @staticmethod
+    def _create_spark_processing_service():
+        """Create the Spark processing service, importing PySpark only when it is requested."""
+        # PySpark (e a JVM) só são carregados aqui, não nos caminhos que usam apenas Pandas;
+        # sem PySpark instalado, o ImportError leva ao serviço de fallback
+        from src.infrastructure.services.spark_data_processing_service import SparkDataProcessingService
+        return SparkDataProcessingService()
+    
+    @staticmethod
+    def _create_fallback_processing_service():
+        """Create the processing service used when the requested one fails to initialize."""
+        # DuckDB (em processo, sem JVM) antes do Pandas, quando estiver instalado
+        try:
+            from src.infrastructure.services.duckdb_data_processing_service import DuckDBDataProcessingService
+            logger.warning("Retornando para implementação DuckDB devido a erro na inicialização")
+            return DuckDBDataProcessingService()
+        except Exception as e:
+            logger.warning(f"DuckDB indisponível ({str(e)}), retornando para implementação Pandas")
             return PandasDataProcessingService()
     
     @staticmethod
@@ -1,8 +1,88 @@
+import functools
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import boto3
+import numpy as np
+import orjson
+import pandas as pd
+from botocore.config import Config
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configurar logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Importar módulos necessários
+from src.infrastructure.config.settings import Settings
+from src.infrastructure.config.data_lake_settings import DataLakeSettings
+
+# Número máximo de tickers extraídos em paralelo (limitado para respeitar o rate limit do Yahoo)
+EXTRACT_MAX_WORKERS = int(os.getenv("EXTRACT_MAX_WORKERS", "8"))
+
+# Listas maiores que o limite são distribuídas pelo SQS (um ticker por mensagem) para outras
+# invocações deste Lambda, em vez de processadas aqui dentro do limite de 15 minutos
+FANOUT_THRESHOLD = int(os.getenv("FANOUT_THRESHOLD", "20"))
+FANOUT_QUEUE_URL = os.getenv("FANOUT_QUEUE_URL")
+
+# Símbolos por requisição do yf.download (o Yahoo aceita até ~20 por URL)
+DOWNLOAD_CHUNK_SIZE = 20
+
+# Colunas de preço gravadas em float32 no parquet da camada bronze (cotações não precisam de mais
+# que ~7 dígitos significativos); o volume continua int64, pois pode passar do limite do int32
+FLOAT32_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Adj Close')
+
+# Colunas de cada item de preço gravado no DynamoDB
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Itens por chamada do batch_write_item (limite do DynamoDB) e tentativas para itens não processados
+DYNAMODB_BATCH_SIZE = 25
+DYNAMODB_MAX_ATTEMPTS = 5
+
+# Pool de conexões para as threads de extração e escrita, com retentativas adaptativas
+BOTO_CLIENT_CONFIG = Config(max_pool_connections=64, retries={'max_attempts': 5, 'mode': 'adaptive'})
+
+_settings = Settings()
+
+# Lotes de escrita do DynamoDB enviados em paralelo
+_write_executor = ThreadPoolExecutor(max_workers=EXTRACT_MAX_WORKERS)
+
+# Uploads para o S3 feitos em segundo plano enquanto a thread do ticker grava no DynamoDB
+_upload_executor = ThreadPoolExecutor(max_workers=EXTRACT_MAX_WORKERS)
+
+# Sessão HTTP e objetos Ticker reaproveitados entre invocações do mesmo container
+# (em containers "quentes" o handshake TLS com o Yahoo não é refeito)
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=0.3)))
+_ticker_cache = {}
+
+# Históricos de períodos já encerrados não mudam, então ficam em memória no container
+# (chave: ticker, início, fim) e reexecuções do mesmo período não voltam ao Yahoo
+HISTORY_CACHE_MAX_ENTRIES = 256
+_history_cache = {}
+_history_cache_lock = threading.Lock()
+
 def lambda_handler(event, context):
     """
     Handler para o Lambda de extração de dados para a camada bronze.
     """
-    logger.info(f"Evento recebido: {json.dumps(event)}")
+    # O evento só é serializado quando o registro for de fato emitido
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Evento recebido: %s", orjson.dumps(event).decode())
+    
+    # Mensagens da fila de fan-out: cada registro é um evento com um único ticker
+    if 'Records' in event:
+        return process_records(event['Records'], context)
     
     try:
         # Extrair parâmetros do evento
@@ -19,9 +99,8 @@ def lambda_handler(event, context):
                 'body': {'error': 'Nenhum ticker especificado'}
             }
         
-        # Inicializar serviços
-        settings = Settings()
-        factory = RepositoryFactory()
+        if action in ('extract_daily_data', 'extract_historical_data') and FANOUT_QUEUE_URL and len(tickers) > FANOUT_THRESHOLD:
+            return fan_out(event, tickers)
         
         # Executar ação solicitada
         if action == 'extract_daily_data':
@@ -52,4 +131,347 @@ def lambda_handler(event, context):
         return {
             'statusCode': 500,
             'body': {'error': str(e)}
-        }
\ No newline at end of file
+        }
+
+@functools.lru_cache(maxsize=1)
+def _s3():
+    """Cliente S3 criado uma vez por container; clientes boto3 são thread-safe e compartilhados pelas threads."""
+    return boto3.client('s3', region_name=_settings.AWS_REGION, config=BOTO_CLIENT_CONFIG)
+
+@functools.lru_cache(maxsize=1)
+def _dynamodb():
+    """Cliente DynamoDB criado uma vez por container e compartilhado pelas threads."""
+    return boto3.client('dynamodb', region_name=_settings.AWS_REGION, config=BOTO_CLIENT_CONFIG)
+
+@functools.lru_cache(maxsize=1)
+def _sqs():
+    """Cliente SQS da fila de fan-out, criado uma vez por container."""
+    return boto3.client('sqs', region_name=_settings.AWS_REGION)
+
+def _message_succeeded(response):
+    """Uma mensagem só é concluída se o handler respondeu 2xx e nenhum ticker terminou com erro."""
+    if not 200 <= response['statusCode'] < 300:
+        return False
+    
+    # Os erros por ticker são capturados e devolvidos com status 200 em body['results']
+    results = response['body'].get('results', {}) if isinstance(response['body'], dict) else {}
+    return all(result.get('status') != 'error' for result in results.values())
+
+def process_records(records, context):
+    """Processa as mensagens da fila de fan-out e informa as que falharam (ReportBatchItemFailures).
+    
+    Só as mensagens com falha voltam para a fila, para nova tentativa ou para a DLQ; as demais são removidas.
+    """
+    failures = []
+    for record in records:
+        try:
+            response = lambda_handler(orjson.loads(record['body']), context)
+            succeeded = _message_succeeded(response)
+        except Exception as e:
+            logger.error("Erro ao processar a mensagem %s: %s", record['messageId'], e, exc_info=True)
+            succeeded = False
+        
+        if not succeeded:
+            failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': failures}
+
+def fan_out(event, tickers):
+    """Publica um evento por ticker na fila de fan-out, em lotes de 10 (limite do send_message_batch)."""
+    entries = [
+        {'Id': str(i), 'MessageBody': orjson.dumps({**event, 'tickers': [ticker]}).decode()}
+        for i, ticker in enumerate(tickers)
+    ]
+    
+    failed = []
+    for i in range(0, len(entries), 10):
+        response = _sqs().send_message_batch(QueueUrl=FANOUT_QUEUE_URL, Entries=entries[i:i + 10])
+        failed.extend(tickers[int(entry['Id'])] for entry in response.get('Failed', []))
+    
+    logger.info(f"{len(entries) - len(failed)} tickers enviados para a fila de fan-out")
+    return {
+        'statusCode': 202,
+        'body': {
+            'queued': len(entries) - len(failed),
+            'failed': failed
+        }
+    }
+
+def get_ticker(symbol):
+    """Obtém o yf.Ticker do símbolo, criado uma única vez por container com a sessão compartilhada."""
+    ticker = _ticker_cache.get(symbol)
+    if ticker is None:
+        try:
+            ticker = yf.Ticker(symbol, session=_session)
+        except Exception:
+            # Versões recentes do yfinance só aceitam a própria sessão (curl_cffi)
+            ticker = yf.Ticker(symbol)
+        _ticker_cache[symbol] = ticker
+    return ticker
+
+def _extract_tickers(tickers, process_one):
+    """Executa a extração de cada ticker em paralelo; cada um é uma cadeia de I/O (Yahoo, S3, DynamoDB)."""
+    results = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(EXTRACT_MAX_WORKERS, len(tickers)))) as executor:
+        for ticker, result in executor.map(process_one, tickers):
+            results[ticker] = result
+    
+    return {
+        'processed': len(results),
+        'results': results
+    }
+
+def extract_daily_data(tickers):
+    """Extrai os dados do último dia para os tickers especificados."""
+    logger.info(f"Extraindo dados diários: {len(tickers)} tickers")
+    
+    # Uma requisição por grupo de tickers em vez de uma por ticker
+    histories = _download_history(tickers, period='1d')
+    
+    # Um único instante para a execução: todos os tickers vão para a mesma partição e chave do dia
+    extracted_at = datetime.now()
+    
+    # Cada ticker tem só o candle do dia, então as gravações no DynamoDB são juntadas
+    # e enviadas ao fim em lotes cheios de 25, em vez de uma chamada por ticker
+    pending_writes = {}
+    
+    def _process_one(ticker):
+        try:
+            df = histories.get(ticker)
+            if df is None or df.empty:
+                # Fallback para a consulta individual quando o download em grupo não trouxe o ticker
+                df = get_ticker(ticker).history(period='1d')
+            
+            if df.empty:
+                logger.warning("Nenhum dado diário encontrado para %s", ticker)
+                return ticker, {
+                    'status': 'error',
+                    'message': 'Nenhum dado encontrado'
+                }
+            
+            s3_key = save_to_s3(ticker, df, 'daily', extracted_at)
+            pending_writes[ticker] = _price_write_requests(ticker, df)
+            
+            return ticker, {
+                'status': 'success',
+                'rows': len(df),
+                's3_key': s3_key
+            }
+        except Exception as e:
+            logger.error("Erro ao extrair dados diários de %s: %s", ticker, e)
+            return ticker, {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    result = _extract_tickers(tickers, _process_one)
+    
+    try:
+        _write_prices([request for write_requests in pending_writes.values() for request in write_requests])
+    except Exception as e:
+        logger.error(f"Erro ao gravar os dados diários no DynamoDB: {str(e)}")
+        for ticker in pending_writes:
+            result['results'][ticker] = {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    return result
+
+def extract_historical_data(tickers, start_date, end_date):
+    """Extrai os dados históricos do período para os tickers especificados."""
+    logger.info(f"Extraindo dados históricos de {start_date} a {end_date}: {len(tickers)} tickers")
+    
+    # Um único instante para a execução: todos os tickers vão para a mesma partição do dia
+    extracted_at = datetime.now()
+    
+    # Períodos já encerrados que este container baixou antes são reaproveitados
+    cacheable = end_date < extracted_at.strftime('%Y-%m-%d')
+    histories = {
+        ticker: _history_cache[(ticker, start_date, end_date)]
+        for ticker in tickers
+        if cacheable and (ticker, start_date, end_date) in _history_cache
+    }
+    
+    # Uma requisição por grupo de tickers em vez de uma por ticker
+    missing = [ticker for ticker in tickers if ticker not in histories]
+    if missing:
+        histories.update(_download_history(missing, start=start_date, end=end_date))
+    
+    def _process_one(ticker):
+        try:
+            df = histories.get(ticker)
+            if df is None or df.empty:
+                # Fallback para a consulta individual quando o download em grupo não trouxe o ticker
+                df = get_ticker(ticker).history(start=start_date, end=end_date)
+            
+            if cacheable and not df.empty:
+                _cache_history((ticker, start_date, end_date), df)
+            
+            if df.empty:
+                logger.warning("Nenhum dado histórico encontrado para %s", ticker)
+                return ticker, {
+                    'status': 'error',
+                    'message': 'Nenhum dado encontrado'
+                }
+            
+            # S3 e DynamoDB são serviços independentes: o upload corre em paralelo com a gravação
+            upload = _upload_executor.submit(save_to_s3, ticker, df, 'historical', extracted_at)
+            save_to_dynamodb(ticker, df)
+            s3_key = upload.result()
+            
+            return ticker, {
+                'status': 'success',
+                'rows': len(df),
+                's3_key': s3_key
+            }
+        except Exception as e:
+            logger.error("Erro ao extrair dados históricos de %s: %s", ticker, e)
+            return ticker, {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    return _extract_tickers(tickers, _process_one)
+
+def _cache_history(key, df):
+    """Guarda o histórico de um período encerrado, descartando o mais antigo quando o cache está cheio."""
+    # Chamado pelas threads de extração
+    with _history_cache_lock:
+        if key not in _history_cache and len(_history_cache) >= HISTORY_CACHE_MAX_ENTRIES:
+            _history_cache.pop(next(iter(_history_cache)))
+        _history_cache[key] = df
+
+def _download_history(tickers, **period):
+    """Baixa o histórico dos tickers com yf.download (período em start/end ou period), em grupos de
+    DOWNLOAD_CHUNK_SIZE, separado por ticker."""
+    histories = {}
+    
+    for i in range(0, len(tickers), DOWNLOAD_CHUNK_SIZE):
+        chunk = tickers[i:i + DOWNLOAD_CHUNK_SIZE]
+        try:
+            df = yf.download(
+                " ".join(chunk),
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **period
+            )
+        except Exception as e:
+            logger.warning("Erro no download em grupo de %s: %s", chunk, e)
+            continue
+        
+        if df is None or df.empty:
+            continue
+        
+        # group_by='ticker' gera colunas (ticker, campo); versões antigas retornam colunas simples para um único ticker
+        if isinstance(df.columns, pd.MultiIndex):
+            for ticker in chunk:
+                if ticker in df.columns.get_level_values(0):
+                    histories[ticker] = df[ticker].dropna(how='all')
+        elif len(chunk) == 1:
+            histories[chunk[0]] = df.dropna(how='all')
+    
+    return histories
+
+def save_to_s3(ticker, df, data_type, timestamp=None):
+    """Salva os preços extraídos em parquet na camada bronze e retorna a chave S3."""
+    timestamp = timestamp or datetime.now()
+    if data_type == 'daily':
+        # Chave determinística: a camada prata encontra o arquivo do dia sem listar o prefixo
+        # (uma nova extração no mesmo dia substitui a anterior)
+        key = DataLakeSettings.get_bronze_daily_key(ticker, timestamp.date())
+    else:
+        path = DataLakeSettings.get_bronze_path(ticker, 'prices', timestamp.date())
+        key = f"{path}{ticker}_{data_type}_{timestamp.strftime('%Y%m%d_%H%M%S')}.parquet"
+    
+    # Parquet (snappy, com estatísticas por coluna para filtros nas leituras das camadas prata/ouro)
+    # escrito direto no buffer; o índice de datas é mantido como no to_parquet
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    
+    # Preços convertidos na tabela Arrow, sem copiar nem alterar o DataFrame (que ainda vai para o DynamoDB)
+    schema = pa.schema(
+        [field.with_type(pa.float32()) if field.name in FLOAT32_COLUMNS else field for field in table.schema],
+        metadata=table.schema.metadata
+    )
+    table = table.cast(schema)
+    
+    parquet_buffer = io.BytesIO()
+    pq.write_table(
+        table,
+        parquet_buffer,
+        compression='snappy',
+        use_dictionary=True,
+        write_statistics=True
+    )
+    parquet_buffer.seek(0)
+    
+    # upload_fileobj envia o buffer em partes, sem a cópia em bytes do getvalue()
+    _s3().upload_fileobj(parquet_buffer, _settings.S3_DATA_BUCKET, key)
+    
+    return key
+
+def save_to_dynamodb(ticker, df):
+    """Grava os preços extraídos na tabela de preços do DynamoDB."""
+    _write_prices(_price_write_requests(ticker, df))
+
+def _price_write_requests(ticker, df):
+    """Monta as requisições de gravação dos preços de um ticker."""
+    # Barras incompletas ou de pregão suspenso vêm do Yahoo com NaN: sem preço ou volume não há
+    # item a gravar (o volume NaN viraria -2**63 na conversão para int64). Valores não finitos
+    # ('nan', 'inf') também são recusados pelo DynamoDB, que rejeitaria o lote inteiro, com
+    # os itens dos outros tickers
+    df = df[np.isfinite(df[PRICE_COLUMNS].to_numpy(dtype='float64')).all(axis=1)]
+    
+    # Colunas convertidas de uma vez (sem criar uma Series por linha como o iterrows);
+    # o tipo do índice é verificado uma vez para o DataFrame inteiro, não por linha
+    if isinstance(df.index, pd.DatetimeIndex):
+        timestamps = df.index.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    else:
+        timestamps = [str(index) for index in df.index]
+    opens = df['Open'].to_numpy(dtype='float64').tolist()
+    highs = df['High'].to_numpy(dtype='float64').tolist()
+    lows = df['Low'].to_numpy(dtype='float64').tolist()
+    closes = df['Close'].to_numpy(dtype='float64').tolist()
+    volumes = df['Volume'].to_numpy(dtype='int64').tolist()
+    
+    # Requisições já no formato do cliente de baixo nível: os números vão como texto,
+    # sem a conversão para Decimal e a validação do serializer do boto3
+    return [
+        {
+            'PutRequest': {
+                'Item': {
+                    'ticker': {'S': ticker},
+                    'timestamp': {'S': timestamp},
+                    'open': {'N': str(open_price)},
+                    'high': {'N': str(high)},
+                    'low': {'N': str(low)},
+                    'close': {'N': str(close)},
+                    'volume': {'N': str(volume)},
+                    'adjusted_close': {'N': str(close)}
+                }
+            }
+        }
+        for timestamp, open_price, high, low, close, volume in zip(timestamps, opens, highs, lows, closes, volumes)
+    ]
+
+def _write_prices(write_requests):
+    """Grava as requisições na tabela de preços em lotes de 25 itens enviados em paralelo."""
+    batches = [write_requests[i:i + DYNAMODB_BATCH_SIZE] for i in range(0, len(write_requests), DYNAMODB_BATCH_SIZE)]
+    for _ in _write_executor.map(_batch_write, batches):
+        pass
+
+def _batch_write(write_requests):
+    """Envia um lote ao DynamoDB, reenviando os itens não processados com backoff."""
+    table_name = _settings.DYNAMODB_PRICES_TABLE
+    
+    for attempt in range(DYNAMODB_MAX_ATTEMPTS):
+        response = _dynamodb().batch_write_item(RequestItems={table_name: write_requests})
+        write_requests = response.get('UnprocessedItems', {}).get(table_name)
+        if not write_requests:
+            return
+        time.sleep(0.05 * 2 ** attempt)
+    
+    raise RuntimeError(f"{len(write_requests)} itens não gravados no DynamoDB após {DYNAMODB_MAX_ATTEMPTS} tentativas")
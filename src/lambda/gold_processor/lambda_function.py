@@ -1,21 +1,69 @@
-import json
+import functools
 import logging
-import boto3
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import boto3
+import orjson
+from botocore.config import Config
+
 # Configurar logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Importar módulos necessários
-from src.domain.settings import Settings
-from src.infrastructure.factory import RepositoryFactory
+from src.infrastructure.config.settings import Settings
+from src.interfaces.factories.repository_factory import RepositoryFactory
+
+# Tickers processados em paralelo; a listagem no S3 é I/O de rede puro
+# (configurável para execuções com centenas de tickers)
+MAX_WORKERS = int(os.getenv("GOLD_MAX_WORKERS", "32"))
+
+# Listas maiores que o limite são distribuídas pelo SQS (um ticker por mensagem) para outras
+# invocações deste Lambda, em vez de processadas aqui dentro do limite de 15 minutos
+FANOUT_THRESHOLD = int(os.getenv("FANOUT_THRESHOLD", "20"))
+FANOUT_QUEUE_URL = os.getenv("FANOUT_QUEUE_URL")
+
+# Por quanto tempo (segundos) a lista de tickers é reaproveitada no mesmo container
+TICKERS_CACHE_TTL = 300
+_tickers_cache = {'timestamp': 0.0, 'tickers': None}
+
+# Configurações e factory criadas uma vez por container e reaproveitadas pelas invocações
+_settings = Settings()
+_factory = RepositoryFactory()
+
+# O pool de conexões padrão do botocore (10) limitaria as threads; o pool acompanha o número
+# de threads para que nenhuma fique esperando por uma conexão livre
+S3_CLIENT_CONFIG = Config(max_pool_connections=max(64, 2 * MAX_WORKERS), retries={'max_attempts': 5, 'mode': 'adaptive'})
+
+@functools.lru_cache(maxsize=1)
+def _s3():
+    """Cliente S3 criado uma vez por container e reutilizado pelas invocações seguintes."""
+    return boto3.client('s3', region_name=_settings.AWS_REGION, config=S3_CLIENT_CONFIG)
+
+@functools.lru_cache(maxsize=1)
+def _sqs():
+    """Cliente SQS da fila de fan-out, criado uma vez por container."""
+    return boto3.client('sqs', region_name=_settings.AWS_REGION)
+
+@functools.lru_cache(maxsize=1)
+def _observability_service():
+    """Serviço de observabilidade (e seus clientes AWS) criado uma vez por container."""
+    return _factory.create_observability_service(_settings)
 
 def lambda_handler(event, context):
     """
     Handler para o Lambda de agregação de dados para a camada ouro.
     """
-    logger.info(f"Evento recebido: {json.dumps(event)}")
+    # O evento só é serializado quando o registro for de fato emitido
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Evento recebido: %s", orjson.dumps(event).decode())
+    
+    # Mensagens da fila de fan-out: cada registro é um evento com um único ticker
+    if 'Records' in event:
+        return process_records(event['Records'], context)
     
     try:
         # Extrair parâmetros do evento
@@ -28,6 +76,9 @@ def lambda_handler(event, context):
         if not tickers:
             # Se nenhum ticker especificado, processe todos
             tickers = get_all_tickers()
+        
+        if FANOUT_QUEUE_URL and len(tickers) > FANOUT_THRESHOLD:
+            return fan_out(event, tickers)
             
         # Agregar para camada ouro
         result = aggregate_to_gold(tickers)
@@ -42,27 +93,92 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'body': {'error': str(e)}
         }
+    finally:
+        # Eventos e métricas vão ao CloudWatch em lotes: o que ficou na fila é enviado
+        # antes de o container ser congelado
+        flush_observability()
+
+def _message_succeeded(response):
+    """Uma mensagem só é concluída se o handler respondeu 2xx e nenhum ticker terminou com erro."""
+    if not 200 <= response['statusCode'] < 300:
+        return False
+    
+    # Os erros por ticker são capturados e devolvidos com status 200 em body['results']
+    results = response['body'].get('results', {}) if isinstance(response['body'], dict) else {}
+    return all(result.get('status') != 'error' for result in results.values())
+
+def process_records(records, context):
+    """Processa as mensagens da fila de fan-out e informa as que falharam (ReportBatchItemFailures).
+    
+    Só as mensagens com falha voltam para a fila, para nova tentativa ou para a DLQ; as demais são removidas.
+    """
+    failures = []
+    for record in records:
+        try:
+            response = lambda_handler(orjson.loads(record['body']), context)
+            succeeded = _message_succeeded(response)
+        except Exception as e:
+            logger.error("Erro ao processar a mensagem %s: %s", record['messageId'], e, exc_info=True)
+            succeeded = False
+        
+        if not succeeded:
+            failures.append({'itemIdentifier': record['messageId']})
+    
+    return {'batchItemFailures': failures}
+
+def fan_out(event, tickers):
+    """Publica um evento por ticker na fila de fan-out, em lotes de 10 (limite do send_message_batch)."""
+    entries = [
+        {'Id': str(i), 'MessageBody': orjson.dumps({**event, 'tickers': [ticker]}).decode()}
+        for i, ticker in enumerate(tickers)
+    ]
+    
+    failed = []
+    for i in range(0, len(entries), 10):
+        response = _sqs().send_message_batch(QueueUrl=FANOUT_QUEUE_URL, Entries=entries[i:i + 10])
+        failed.extend(tickers[int(entry['Id'])] for entry in response.get('Failed', []))
+    
+    logger.info(f"{len(entries) - len(failed)} tickers enviados para a fila de fan-out")
+    return {
+        'statusCode': 202,
+        'body': {
+            'queued': len(entries) - len(failed),
+            'failed': failed
+        }
+    }
+
+def flush_observability():
+    """Envia ao CloudWatch os eventos e métricas da invocação que ainda estão na fila."""
+    try:
+        _observability_service().flush()
+    except Exception as e:
+        logger.warning("Não foi possível enviar os dados de observabilidade: %s", e)
 
 def get_all_tickers():
     """Obtém todos os tickers disponíveis na camada prata"""
-    settings = Settings()
-    s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
+    # O universo de tickers raramente muda, então invocações próximas reaproveitam a listagem
+    if _tickers_cache['tickers'] is not None and time.time() - _tickers_cache['timestamp'] < TICKERS_CACHE_TTL:
+        return list(_tickers_cache['tickers'])
+    
+    s3_client = _s3()
     
     # Listar pastas de tickers na silver
-    response = s3_client.list_objects_v2(
-        Bucket=settings.S3_DATA_BUCKET,
+    # Paginado: uma única chamada retornaria no máximo 1000 prefixos
+    paginator = s3_client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=_settings.S3_DATA_BUCKET,
         Prefix='silver/stocks/',
-        Delimiter='/'
+        Delimiter='/',
+        PaginationConfig={'PageSize': 1000}
     )
     
-    tickers = []
-    if 'CommonPrefixes' in response:
-        for prefix in response['CommonPrefixes']:
-            ticker_path = prefix['Prefix'].split('/')
-            if len(ticker_path) >= 3:
-                tickers.append(ticker_path[2])
+    # Prefixos no formato "<camada>/stocks/<ticker>/"
+    tickers = [prefix['Prefix'].rsplit('/', 2)[-2] for page in pages for prefix in page.get('CommonPrefixes', [])]
+    
+    _tickers_cache['timestamp'] = time.time()
+    _tickers_cache['tickers'] = tickers
     
-    return tickers
+    return list(tickers)
 
 def aggregate_to_gold(tickers):
     """Agrega dados da camada prata para ouro para os tickers especificados."""
@@ -70,58 +186,64 @@ def aggregate_to_gold(tickers):
     
     results = {}
     
-    # Inicializar serviços
-    settings = Settings()
+    # Serviços do container (criados na primeira invocação)
+    observability_service = _observability_service()
     
-    # Inicializar factories e serviços
-    factory = RepositoryFactory()
-    observability_service = factory.create_observability_service(settings)
+    # Cliente S3 compartilhado pelas threads (clientes boto3 são thread-safe)
+    s3_client = _s3()
     
     # Criar instância do caso de uso de camada ouro
     from src.application.use_cases.gold_layer import AggregateToGoldLayerUseCase
     gold_use_case = AggregateToGoldLayerUseCase(
-        bucket_name=settings.S3_DATA_BUCKET,
+        bucket_name=_settings.S3_DATA_BUCKET,
         observability_service=observability_service,
-        s3_client=boto3.client('s3', region_name=settings.AWS_REGION)
+        s3_client=s3_client
     )
     
-    # Processar cada ticker
-    for ticker in tickers:
+    def _process_ticker(ticker):
         try:
             # Listar arquivos da camada prata para este ticker
-            s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
             silver_path_prefix = f"silver/stocks/{ticker}/prices/"
             
-            response = s3_client.list_objects_v2(
-                Bucket=settings.S3_DATA_BUCKET,
-                Prefix=silver_path_prefix
-            )
+            # Paginado para não truncar em 1000 arquivos
+            paginator = s3_client.get_paginator('list_objects_v2')
+            silver_keys = [
+                item['Key']
+                for page in paginator.paginate(
+                    Bucket=_settings.S3_DATA_BUCKET,
+                    Prefix=silver_path_prefix,
+                    PaginationConfig={'PageSize': 1000}
+                )
+                for item in page.get('Contents', [])
+            ]
             
-            if 'Contents' in response and len(response['Contents']) > 0:
-                # Coletar as chaves dos arquivos silver
-                silver_keys = [item['Key'] for item in response['Contents']]
-                
+            if silver_keys:
                 # Agregar dados para camada ouro
                 gold_keys = gold_use_case.aggregate_stock_data(ticker, silver_keys)
                 
-                results[ticker] = {
+                return {
                     'status': 'success',
                     'silver_keys_count': len(silver_keys),
                     'gold_keys': gold_keys
                 }
             else:
-                logger.warning(f"Nenhum arquivo prata encontrado para {ticker}")
-                results[ticker] = {
+                logger.warning("Nenhum arquivo prata encontrado para %s", ticker)
+                return {
                     'status': 'error',
                     'message': 'Nenhum arquivo prata encontrado'
                 }
         except Exception as e:
-            logger.error(f"Erro ao agregar {ticker} para camada ouro: {str(e)}")
-            results[ticker] = {
+            logger.error("Erro ao agregar %s para camada ouro: %s", ticker, e)
+            return {
                 'status': 'error',
                 'message': str(e)
             }
     
+    # Processar os tickers em paralelo
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(tickers)))) as executor:
+        for ticker, result in zip(tickers, executor.map(_process_ticker, tickers)):
+            results[ticker] = result
+    
     return {
         'processed': len(results),
         'results': results
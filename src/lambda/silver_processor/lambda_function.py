@@ -1,21 +1,74 @@
-import json
+import functools
 import logging
-import boto3
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from operator import itemgetter
+
+import boto3
+import orjson
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
 # Configurar logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Importar módulos necessários
-from src.domain.settings import Settings
-from src.infrastructure.factory import RepositoryFactory
+from src.infrastructure.config.settings import Settings
+from src.infrastructure.config.data_lake_settings import DataLakeSettings
+from src.interfaces.factories.repository_factory import RepositoryFactory
+
+# Tickers processados em paralelo; a listagem e a leitura no S3 são I/O de rede puro
+# (configurável para ajustar ao tamanho da lista e à memória do Lambda)
+MAX_WORKERS = int(os.getenv("SILVER_MAX_WORKERS", "32"))
+
+# Serviço de processamento em processo: o arquivo bronze de um ticker tem poucos MB, e subir uma
+# JVM/SparkSession dentro do Lambda custaria mais que a transformação ('spark' fica para Glue/EMR)
+PROCESSING_SERVICE = os.getenv("SILVER_PROCESSING_SERVICE", "pandas")
+
+# Por quanto tempo (segundos) a lista de tickers é reaproveitada no mesmo container
+# (o universo da bronze muda no máximo uma vez por dia, com a extração)
+TICKERS_CACHE_TTL = int(os.getenv("TICKERS_CACHE_TTL", "3600"))
+_tickers_cache = {'timestamp': 0.0, 'tickers': None}
+
+# Configurações e factory criadas uma vez por container e reaproveitadas pelas invocações
+_settings = Settings()
+_factory = RepositoryFactory()
+
+# O pool de conexões padrão do botocore (10) limitaria as threads; o pool acompanha o número
+# de threads para que nenhuma fique esperando por uma conexão livre
+S3_CLIENT_CONFIG = Config(max_pool_connections=max(64, 2 * MAX_WORKERS), retries={'max_attempts': 5, 'mode': 'adaptive'})
+
+@functools.lru_cache(maxsize=1)
+def _s3():
+    """Cliente S3 criado uma vez por container e reutilizado pelas invocações seguintes."""
+    return boto3.client('s3', region_name=_settings.AWS_REGION, config=S3_CLIENT_CONFIG)
+
+@functools.lru_cache(maxsize=1)
+def _observability_service():
+    """Serviço de observabilidade (e seus clientes AWS) criado uma vez por container."""
+    return _factory.create_observability_service(_settings)
+
+@functools.lru_cache(maxsize=1)
+def _silver_use_case():
+    """Caso de uso da camada prata (e seu serviço de processamento) criado uma vez por container."""
+    from src.application.use_cases.silver_layer import ProcessToSilverLayerUseCase
+    return ProcessToSilverLayerUseCase(
+        bucket_name=_settings.S3_DATA_BUCKET,
+        data_processing_service=_factory.create_data_processing_service(PROCESSING_SERVICE),
+        observability_service=_observability_service(),
+        s3_client=_s3()
+    )
 
 def lambda_handler(event, context):
     """
     Handler para o Lambda de processamento de dados para a camada prata.
     """
-    logger.info(f"Evento recebido: {json.dumps(event)}")
+    # O evento só é serializado quando o registro for de fato emitido
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Evento recebido: %s", orjson.dumps(event).decode())
     
     try:
         # Extrair parâmetros do evento
@@ -43,27 +96,76 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'body': {'error': str(e)}
         }
+    finally:
+        # Eventos e métricas vão ao CloudWatch em lotes: o que ficou na fila é enviado
+        # antes de o container ser congelado
+        flush_observability()
+
+def flush_observability():
+    """Envia ao CloudWatch os eventos e métricas da invocação que ainda estão na fila."""
+    try:
+        _observability_service().flush()
+    except Exception as e:
+        logger.warning("Não foi possível enviar os dados de observabilidade: %s", e)
 
 def get_all_tickers():
     """Obtém todos os tickers disponíveis na camada bronze"""
-    settings = Settings()
-    s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
+    # O universo de tickers raramente muda, então invocações próximas reaproveitam a listagem
+    # (uma listagem vazia não é reaproveitada, para não esconder os tickers da primeira extração)
+    if _tickers_cache['tickers'] and time.time() - _tickers_cache['timestamp'] < TICKERS_CACHE_TTL:
+        return list(_tickers_cache['tickers'])
+    
+    s3_client = _s3()
     
     # Listar pastas de tickers na bronze
-    response = s3_client.list_objects_v2(
-        Bucket=settings.S3_DATA_BUCKET,
+    # Paginado: uma única chamada retornaria no máximo 1000 prefixos
+    paginator = s3_client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=_settings.S3_DATA_BUCKET,
         Prefix='bronze/stocks/',
-        Delimiter='/'
+        Delimiter='/',
+        PaginationConfig={'PageSize': 1000}
     )
     
-    tickers = []
-    if 'CommonPrefixes' in response:
-        for prefix in response['CommonPrefixes']:
-            ticker_path = prefix['Prefix'].split('/')
-            if len(ticker_path) >= 3:
-                tickers.append(ticker_path[2])
+    # Prefixos no formato "<camada>/stocks/<ticker>/"
+    tickers = [prefix['Prefix'].rsplit('/', 2)[-2] for page in pages for prefix in page.get('CommonPrefixes', [])]
     
-    return tickers
+    _tickers_cache['timestamp'] = time.time()
+    _tickers_cache['tickers'] = tickers
+    
+    return list(tickers)
+
+def find_bronze_key(ticker, day_partition, day_label):
+    """Obtém a chave do arquivo bronze do dia para o ticker (None se não houver)."""
+    s3_client = _s3()
+    bronze_path_prefix = DataLakeSettings.get_bronze_partition_path(ticker, 'prices', day_partition)
+    
+    # A extração diária grava em uma chave determinística: um HEAD evita listar o prefixo
+    daily_key = DataLakeSettings.get_bronze_daily_key_from_parts(bronze_path_prefix, ticker, day_label)
+    try:
+        s3_client.head_object(Bucket=_settings.S3_DATA_BUCKET, Key=daily_key)
+        return daily_key
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+    
+    # Outros arquivos (dados históricos, carga pela camada bronze): o mais recente do dia
+    # Paginado para considerar todos os arquivos do dia (uma chamada retorna no máximo 1000)
+    paginator = s3_client.get_paginator('list_objects_v2')
+    contents = [
+        item
+        for page in paginator.paginate(
+            Bucket=_settings.S3_DATA_BUCKET,
+            Prefix=bronze_path_prefix,
+            PaginationConfig={'PageSize': 1000}
+        )
+        for item in page.get('Contents', [])
+    ]
+    
+    if not contents:
+        return None
+    
+    return max(contents, key=itemgetter('LastModified'))['Key']
 
 def process_to_silver(tickers, days=30):
     """Processa dados da camada bronze para prata para os tickers especificados."""
@@ -73,62 +175,46 @@ def process_to_silver(tickers, days=30):
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
-    # Inicializar serviços
-    settings = Settings()
-    
-    # Inicializar factories e serviços
-    factory = RepositoryFactory()
-    observability_service = factory.create_observability_service(settings)
-    data_processing_service = factory.create_data_processing_service('spark')
+    # Mesmo dia para todos os tickers: a partição (year=/month=/day=/) e a data do arquivo
+    # diário são formatadas uma vez e reaproveitadas pelas threads
+    day_partition = DataLakeSettings.get_day_partition(end_date)
+    day_label = end_date.strftime('%Y-%m-%d')
     
-    # Criar instância do caso de uso de camada prata
-    from src.application.use_cases.silver_layer import ProcessToSilverLayerUseCase
-    silver_use_case = ProcessToSilverLayerUseCase(
-        bucket_name=settings.S3_DATA_BUCKET,
-        data_processing_service=data_processing_service,
-        observability_service=observability_service,
-        s3_client=boto3.client('s3', region_name=settings.AWS_REGION)
-    )
+    # Caso de uso do container (criado na primeira invocação), compartilhado pelas threads
+    silver_use_case = _silver_use_case()
     
-    # Processar cada ticker
-    for ticker in tickers:
+    def _process_ticker(ticker):
         try:
-            # Definir caminho bronze (último arquivo inserido)
-            bronze_path_prefix = f"bronze/stocks/{ticker}/prices/year={end_date.year}/month={end_date.month:02d}/day={end_date.day:02d}/"
+            # Arquivo bronze do dia
+            bronze_key = find_bronze_key(ticker, day_partition, day_label)
             
-            # Listar objetos no S3 para encontrar o mais recente
-            s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
-            response = s3_client.list_objects_v2(
-                Bucket=settings.S3_DATA_BUCKET,
-                Prefix=bronze_path_prefix
-            )
-            
-            if 'Contents' in response and len(response['Contents']) > 0:
-                # Ordenar por data para pegar o mais recente
-                latest_file = sorted(response['Contents'], key=lambda x: x['LastModified'], reverse=True)[0]
-                bronze_key = latest_file['Key']
-                
+            if bronze_key:
                 # Processar o arquivo bronze para prata
                 silver_key = silver_use_case.process_stock_data(ticker, bronze_key)
                 
-                results[ticker] = {
+                return {
                     'status': 'success',
                     'bronze_key': bronze_key,
                     'silver_key': silver_key
                 }
             else:
-                logger.warning(f"Nenhum arquivo bronze encontrado para {ticker}")
-                results[ticker] = {
+                logger.warning("Nenhum arquivo bronze encontrado para %s", ticker)
+                return {
                     'status': 'error',
                     'message': 'Nenhum arquivo bronze encontrado'
                 }
         except Exception as e:
-            logger.error(f"Erro ao processar {ticker} para camada prata: {str(e)}")
-            results[ticker] = {
+            logger.error("Erro ao processar %s para camada prata: %s", ticker, e)
+            return {
                 'status': 'error',
                 'message': str(e)
             }
     
+    # Processar os tickers em paralelo
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(tickers)))) as executor:
+        for ticker, result in zip(tickers, executor.map(_process_ticker, tickers)):
+            results[ticker] = result
+    
     return {
         'processed': len(results),
         'results': results
@@ -4,7 +4,9 @@ import logging
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from operator import itemgetter
 import boto3
 
 # Adiciona o diretório raiz do projeto ao Python path
@@ -21,6 +23,9 @@ logging.basicConfig(
 
 logger = logging.getLogger("full_pipeline_test")
 
+# Tickers processados em paralelo no teste com vários tickers
+PIPELINE_MAX_WORKERS = 8
+
 
 # Teste de conexão com AWS
 try:
@@ -46,7 +51,14 @@ def parse_args():
                         help='Etapas do pipeline a serem executadas')
     parser.add_argument('--verbose', action='store_true', help='Ativar logging detalhado')
     parser.add_argument('--tickers', type=str, help='Lista de múltiplos tickers separados por vírgula (ex: AAPL,MSFT,GOOG)')
-    return parser.parse_args()
+    parser.add_argument('--bronze-key', type=str,
+                        help='Chave do arquivo bronze para as etapas silver/silver-gold (evita a listagem no S3; um único ticker)')
+    args = parser.parse_args()
+    
+    if args.bronze_key and args.tickers and len(args.tickers.split(',')) > 1:
+        parser.error('--bronze-key só pode ser usado com um único ticker')
+    
+    return args
 
 def main():
     """Função principal para teste do pipeline completo."""
@@ -86,37 +98,67 @@ def main():
             use_spark=args.use_spark
         )
         
-        # Processar cada ticker
-        results = {}
+        # Definir intervalo de datas (o mesmo para todos os tickers)
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=args.days)
         
-        for ticker in tickers:
+        # Extrair os dados de todos os tickers em uma única chamada do yf.download,
+        # em vez de uma requisição por ticker dentro do loop
+        histories = {}
+        if args.steps in ['all', 'bronze', 'bronze-silver']:
+            try:
+                all_df = yf.download(
+                    " ".join(tickers),
+                    start=start_date,
+                    end=end_date,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False
+                )
+                
+                # group_by='ticker' gera colunas (ticker, campo); versões antigas retornam colunas simples para um único ticker
+                if isinstance(all_df.columns, pd.MultiIndex):
+                    histories = {
+                        ticker: all_df[ticker].dropna(how='all')
+                        for ticker in tickers
+                        if ticker in all_df.columns.get_level_values(0)
+                    }
+                elif len(tickers) == 1:
+                    histories = {tickers[0]: all_df.dropna(how='all')}
+            except Exception as e:
+                logger.warning(f"Erro no download em grupo, extraindo ticker a ticker: {str(e)}")
+        
+        # Processar um ticker (bronze → prata → ouro); retorna None quando não há o que registrar
+        def _run_ticker(ticker):
             ticker_start_time = time.time()
             
             logger.info(f"Processando ticker: {ticker}")
             
             try:
-                # Definir intervalo de datas
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=args.days)
-                
                 ticker_result = {
                     "ticker": ticker,
                     "steps": {}
                 }
                 
+                # Dados gravados na bronze nesta execução, reaproveitados pela etapa prata
+                bronze_df = None
+                
                 # 1. Extrair dados usando yfinance e carregar na camada Bronze
                 if args.steps in ['all', 'bronze', 'bronze-silver']:
                     logger.info(f"Extraindo dados para {ticker} de {start_date.date()} até {end_date.date()}...")
-                    stock = yf.Ticker(ticker)
-                    df = stock.history(start=start_date, end=end_date)
+                    df = histories.get(ticker)
+                    if df is None or df.empty:
+                        # Consulta individual quando o download em grupo não trouxe o ticker
+                        stock = yf.Ticker(ticker)
+                        df = stock.history(start=start_date, end=end_date)
                     
                     if df.empty:
                         logger.warning(f"Nenhum dado disponível para {ticker} no período especificado")
-                        results[ticker] = {
+                        return ticker, {
                             "status": "error",
                             "error": "Nenhum dado disponível"
                         }
-                        continue
                     
                     # Resetar o índice para ter 'Date' como coluna
                     df = df.reset_index()
@@ -132,6 +174,7 @@ def main():
                     )
                     bronze_time = time.time() - bronze_start_time
                     logger.info(f"Dados carregados na camada Bronze em {bronze_time:.2f}s: {bronze_key}")
+                    bronze_df = df
                     
                     ticker_result["steps"]["bronze"] = {
                         "status": "success",
@@ -143,7 +186,11 @@ def main():
                 # 2. Processar para camada Prata
                 if args.steps in ['all', 'silver', 'bronze-silver', 'silver-gold']:
                     # Se estamos apenas executando a etapa silver, precisamos encontrar um arquivo bronze
-                    if args.steps in ['silver', 'silver-gold']:
+                    if args.steps in ['silver', 'silver-gold'] and args.bronze_key:
+                        # Chave informada pelo orquestrador: nenhuma listagem necessária
+                        bronze_key = args.bronze_key
+                        logger.info(f"Usando arquivo bronze informado: {bronze_key}")
+                    elif args.steps in ['silver', 'silver-gold']:
                         import boto3
                         from src.infrastructure.config.data_lake_settings import DataLakeSettings
                         
@@ -151,25 +198,29 @@ def main():
                         s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
                         bronze_path_prefix = f"bronze/stocks/{ticker}/prices/"
                         
-                        response = s3_client.list_objects_v2(
-                            Bucket=settings.S3_DATA_BUCKET,
-                            Prefix=bronze_path_prefix
-                        )
+                        # Paginado: uma única chamada retornaria no máximo 1000 arquivos
+                        paginator = s3_client.get_paginator('list_objects_v2')
+                        contents = [
+                            item
+                            for page in paginator.paginate(Bucket=settings.S3_DATA_BUCKET, Prefix=bronze_path_prefix)
+                            for item in page.get('Contents', [])
+                        ]
                         
-                        if 'Contents' in response and len(response['Contents']) > 0:
-                            # Ordenar por data para pegar o mais recente
-                            latest_file = sorted(response['Contents'], key=lambda x: x['LastModified'], reverse=True)[0]
+                        if contents:
+                            # O mais recente em uma única passada, sem ordenar a lista
+                            latest_file = max(contents, key=itemgetter('LastModified'))
                             bronze_key = latest_file['Key']
                             logger.info(f"Usando arquivo bronze existente: {bronze_key}")
                         else:
                             logger.error(f"Nenhum arquivo bronze encontrado para {ticker}")
-                            continue
+                            return ticker, None
                     
                     logger.info(f"Processando dados para camada Prata...")
                     silver_start_time = time.time()
                     silver_key = silver_use_case.process_stock_data(
                         ticker=ticker,
-                        bronze_key=bronze_key
+                        bronze_key=bronze_key,
+                        bronze_data=bronze_df
                     )
                     silver_time = time.time() - silver_start_time
                     logger.info(f"Dados processados para camada Prata em {silver_time:.2f}s: {silver_key}")
@@ -190,18 +241,19 @@ def main():
                         s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
                         silver_path_prefix = f"silver/stocks/{ticker}/prices/"
                         
-                        response = s3_client.list_objects_v2(
-                            Bucket=settings.S3_DATA_BUCKET,
-                            Prefix=silver_path_prefix
-                        )
+                        # Paginado: uma única chamada retornaria no máximo 1000 arquivos
+                        paginator = s3_client.get_paginator('list_objects_v2')
+                        silver_keys = [
+                            item['Key']
+                            for page in paginator.paginate(Bucket=settings.S3_DATA_BUCKET, Prefix=silver_path_prefix)
+                            for item in page.get('Contents', [])
+                        ]
                         
-                        if 'Contents' in response and len(response['Contents']) > 0:
-                            # Coletar as chaves dos arquivos silver
-                            silver_keys = [item['Key'] for item in response['Contents']]
+                        if silver_keys:
                             logger.info(f"Encontrados {len(silver_keys)} arquivos silver para {ticker}")
                         else:
                             logger.error(f"Nenhum arquivo silver encontrado para {ticker}")
-                            continue
+                            return ticker, None
                     else:
                         # Usar apenas o arquivo silver que acabamos de criar
                         silver_keys = [silver_key]
@@ -225,18 +277,25 @@ def main():
                 ticker_time = time.time() - ticker_start_time
                 ticker_result["total_time"] = ticker_time
                 ticker_result["status"] = "success"
-                results[ticker] = ticker_result
                 
                 logger.info(f"Ticker {ticker} processado com sucesso em {ticker_time:.2f}s")
+                return ticker, ticker_result
                 
             except Exception as e:
                 logger.error(f"Erro no processamento de {ticker}: {str(e)}", exc_info=True)
-                results[ticker] = {
+                return ticker, {
                     "status": "error",
                     "error": str(e),
                     "time": time.time() - ticker_start_time
                 }
         
+        # Os tickers são independentes e cada etapa espera por I/O (Yahoo, S3), então rodam em paralelo
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(PIPELINE_MAX_WORKERS, len(tickers)))) as executor:
+            for ticker, ticker_result in executor.map(_run_ticker, tickers):
+                if ticker_result is not None:
+                    results[ticker] = ticker_result
+        
         # Sumário
         total_time = time.time() - start_time
         success_count = len([r for r in results.values() if r.get("status") == "success"])
@@ -0,0 +1,124 @@
+# tests/unit/lambda/test_data_extractor.py
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# O Lambda importa suas dependências (boto3, yfinance) no carregamento do módulo
+pytest.importorskip("boto3")
+pytest.importorskip("yfinance")
+
+LAMBDA_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "src", "lambda", "data_extractor", "lambda_function.py"
+)
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    """Carrega o módulo do Lambda pelo caminho ('lambda' não é um nome de pacote importável)."""
+    spec = importlib.util.spec_from_file_location("data_extractor_lambda_function", LAMBDA_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _prices(rows):
+    return pd.DataFrame(
+        rows,
+        columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+        index=pd.date_range('2024-01-02', periods=len(rows), freq='D', name='Date')
+    )
+
+
+def _items(write_requests):
+    return [request['PutRequest']['Item'] for request in write_requests]
+
+
+def test_price_write_requests_builds_one_item_per_row(extractor):
+    df = _prices([[10.0, 11.0, 9.5, 10.5, 1000], [10.5, 12.0, 10.0, 11.5, 2000]])
+
+    items = _items(extractor._price_write_requests('AAPL', df))
+
+    assert [item['timestamp']['S'] for item in items] == ['2024-01-02T00:00:00', '2024-01-03T00:00:00']
+    assert items[1] == {
+        'ticker': {'S': 'AAPL'},
+        'timestamp': {'S': '2024-01-03T00:00:00'},
+        'open': {'N': '10.5'},
+        'high': {'N': '12.0'},
+        'low': {'N': '10.0'},
+        'close': {'N': '11.5'},
+        'volume': {'N': '2000'},
+        'adjusted_close': {'N': '11.5'}
+    }
+
+
+def test_price_write_requests_skips_rows_with_nan_volume(extractor):
+    df = _prices([[10.0, 11.0, 9.5, 10.5, 1000.0], [10.5, 12.0, 10.0, 11.5, np.nan]])
+
+    items = _items(extractor._price_write_requests('AAPL', df))
+
+    assert [item['timestamp']['S'] for item in items] == ['2024-01-02T00:00:00']
+    assert items[0]['volume'] == {'N': '1000'}
+
+
+def test_price_write_requests_skips_non_finite_prices(extractor):
+    df = _prices([
+        [10.0, 11.0, 9.5, 10.5, 1000.0],
+        [np.nan, np.nan, np.nan, np.nan, np.nan],
+        [10.5, np.inf, 10.0, 11.5, 2000.0],
+        [11.0, 12.0, 10.5, 11.0, 3000.0]
+    ])
+
+    items = _items(extractor._price_write_requests('AAPL', df))
+
+    assert [item['timestamp']['S'] for item in items] == ['2024-01-02T00:00:00', '2024-01-05T00:00:00']
+    for item in items:
+        for field in ('open', 'high', 'low', 'close', 'volume', 'adjusted_close'):
+            assert np.isfinite(float(item[field]['N']))
+
+
+def test_sqs_records_report_only_failed_messages(extractor, monkeypatch):
+    def extract_daily_data(tickers):
+        if tickers == ['BAD']:
+            raise RuntimeError('falha no Yahoo')
+        return {'processed': 1, 'results': {}}
+
+    monkeypatch.setattr(extractor, 'extract_daily_data', extract_daily_data)
+    event = {'Records': [
+        {'messageId': 'ok', 'body': '{"tickers": ["AAPL"]}'},
+        {'messageId': 'failed', 'body': '{"tickers": ["BAD"]}'},
+        {'messageId': 'malformed', 'body': '{'}
+    ]}
+
+    response = extractor.lambda_handler(event, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'failed'}, {'itemIdentifier': 'malformed'}]}
+
+
+def test_sqs_records_report_messages_with_failed_tickers(extractor, monkeypatch):
+    class _Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+        
+        def history(self, period):
+            if self.symbol == 'BAD':
+                raise RuntimeError('Yahoo 429')
+            return _prices([[10.0, 11.0, 9.5, 10.5, 1000.0]])
+
+    written = []
+    # O download em grupo não traz nenhum ticker: cada um cai na consulta individual
+    monkeypatch.setattr(extractor, '_download_history', lambda tickers, **period: {})
+    monkeypatch.setattr(extractor, 'get_ticker', _Ticker)
+    monkeypatch.setattr(extractor, 'save_to_s3', lambda ticker, df, data_type, timestamp=None: f'bronze/{ticker}.parquet')
+    monkeypatch.setattr(extractor, '_write_prices', written.extend)
+    event = {'Records': [
+        {'messageId': 'ok', 'body': '{"tickers": ["AAPL"]}'},
+        {'messageId': 'failed', 'body': '{"tickers": ["BAD"]}'}
+    ]}
+
+    response = extractor.lambda_handler(event, None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': 'failed'}]}
+    assert len(written) == 1
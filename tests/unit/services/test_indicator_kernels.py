@@ -0,0 +1,83 @@
+# tests/unit/services/test_indicator_kernels.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("numba")
+
+from src.infrastructure.services import indicator_kernels
+from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
+
+
+@pytest.fixture(scope="module")
+def close():
+    """Random walk with a flat stretch (RSI undefined) and a rising-only stretch."""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 120))
+    close[40:60] = close[39]
+    close[80:95] = close[79] + np.arange(1, 16)
+    return close
+
+
+@pytest.fixture(scope="module")
+def result(close):
+    timestamps = pd.date_range('2024-01-02', periods=len(close), freq='D')
+    records = [
+        {'timestamp': timestamp.isoformat(), 'open': price, 'high': price + 1, 'low': price - 1, 'close': price, 'volume': 1000}
+        for timestamp, price in zip(timestamps, close.tolist())
+    ]
+    return PandasDataProcessingService().process_batch_data('kernels', records)
+
+
+def _defined(values):
+    return values[~np.isnan(values)].tolist()
+
+
+def test_compiled_kernels_are_used():
+    assert indicator_kernels.NUMBA_AVAILABLE
+    assert indicator_kernels.sma_std is not indicator_kernels._sma_std_numpy
+
+
+def test_batch_succeeds_with_read_only_prices(result):
+    # pandas 3 (Copy-on-Write) hands the kernels read-only arrays
+    assert 'error' not in result
+
+
+@pytest.mark.parametrize("window", [5, 20, 50])
+def test_sma_matches_numpy_fallback(result, close, window):
+    expected, _ = indicator_kernels._sma_std_numpy(close, window)
+    assert result[f'sma_{window}']['value'] == pytest.approx(_defined(expected), rel=1e-9)
+
+
+def test_bollinger_bands_match_numpy_fallback(result, close):
+    middle, std = indicator_kernels._sma_std_numpy(close, 20)
+    bands = result['bollinger_bands']
+    assert bands['middle'] == pytest.approx(_defined(middle), rel=1e-9)
+    assert bands['upper'] == pytest.approx(_defined(middle + 2 * std), rel=1e-9)
+    assert bands['lower'] == pytest.approx(_defined(middle - 2 * std), rel=1e-9)
+
+
+def test_rsi_matches_numpy_fallback(result, close):
+    expected = indicator_kernels._rsi_numpy(close, 14)
+    assert result['rsi_14']['value'] == pytest.approx(_defined(expected), rel=1e-9)
+
+
+@pytest.mark.parametrize("window", [5, 20])
+def test_ema_matches_pandas_fallback(result, close, window):
+    expected = indicator_kernels._ema_pandas(close, window)
+    assert result[f'ema_{window}']['value'] == pytest.approx(expected.tolist(), rel=1e-9)
+
+
+def test_macd_matches_pandas_fallback(result, close):
+    macd, signal, histogram = indicator_kernels._macd_pandas(close, 12, 26, 9)
+    assert result['macd']['macd'] == pytest.approx(macd.tolist(), rel=1e-9, abs=1e-9)
+    assert result['macd']['signal'] == pytest.approx(signal.tolist(), rel=1e-9, abs=1e-9)
+    assert result['macd']['histogram'] == pytest.approx(histogram.tolist(), rel=1e-9, abs=1e-9)
+
+
+def test_ema_and_macd_kernels_accept_read_only_arrays(close):
+    read_only = close.copy()
+    read_only.flags.writeable = False
+    assert indicator_kernels.ema(read_only, 20).tolist() == pytest.approx(indicator_kernels._ema_pandas(close, 20).tolist(), rel=1e-9)
+    for actual, expected in zip(indicator_kernels.macd(read_only, 12, 26, 9), indicator_kernels._macd_pandas(close, 12, 26, 9)):
+        assert actual.tolist() == pytest.approx(expected.tolist(), rel=1e-9, abs=1e-9)
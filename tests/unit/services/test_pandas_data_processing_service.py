@@ -0,0 +1,40 @@
+# tests/unit/services/test_pandas_data_processing_service.py
+import pandas as pd
+import pytest
+
+from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
+
+
+def _records(n=40):
+    timestamps = pd.date_range('2024-01-02', periods=n, freq='D')
+    return [
+        {'timestamp': timestamp.isoformat(), 'open': 100.0 + i, 'high': 101.0 + i, 'low': 99.0 + i, 'close': 100.5 + i, 'volume': 1000}
+        for i, timestamp in enumerate(timestamps)
+    ]
+
+
+def _fail(*args):
+    raise RuntimeError('falha no indicador')
+
+
+def test_failed_series_indicator_is_an_empty_series(monkeypatch):
+    service = PandasDataProcessingService()
+    monkeypatch.setattr(service, '_calculate_rsi', _fail)
+
+    result = service.process_batch_data('batch', _records())
+
+    assert result['rsi_14'] == {'timestamp': [], 'value': []}
+    assert result['sma_20']['timestamp']
+
+
+def test_failed_multi_column_indicators_keep_their_columns(monkeypatch):
+    service = PandasDataProcessingService()
+    monkeypatch.setattr(service, '_calculate_bollinger_bands', _fail)
+    monkeypatch.setattr(service, '_calculate_macd', _fail)
+    monkeypatch.setattr(service, '_calculate_statistics', _fail)
+
+    result = service.process_batch_data('batch', _records())
+
+    assert result['bollinger_bands'] == {'timestamp': [], 'upper': [], 'middle': [], 'lower': []}
+    assert result['macd'] == {'timestamp': [], 'macd': [], 'signal': [], 'histogram': []}
+    assert result['statistics'] == {}
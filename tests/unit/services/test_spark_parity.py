@@ -0,0 +1,95 @@
+# tests/unit/services/test_spark_parity.py
+import numpy as np
+import pandas as pd
+import pytest
+
+pyspark = pytest.importorskip("pyspark")
+
+import pyarrow as pa
+from pyspark.sql import SparkSession
+
+from src.infrastructure.services import indicator_kernels
+from src.infrastructure.services.pandas_data_processing_service import PandasDataProcessingService
+from src.infrastructure.services.spark_data_processing_service import SparkDataProcessingService, _add_ewm_columns
+
+WINDOW_INDICATORS = ['sma_5', 'sma_20', 'sma_50', 'rsi_14', 'bollinger_bands']
+EWM_INDICATORS = ['ema_5', 'ema_20', 'macd']
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = SparkSession.builder \
+        .appName("SparkParityTest") \
+        .master("local[1]") \
+        .config("spark.sql.session.timeZone", "UTC") \
+        .getOrCreate()
+    yield session
+    session.stop()
+
+
+def _records():
+    """Random walk with a flat stretch (no gains or losses) and a rising-only stretch (no losses)."""
+    rng = np.random.default_rng(42)
+    close = 100 + np.cumsum(rng.normal(0, 1, 90))
+    close[30:50] = close[29]
+    close[60:80] = close[59] + np.arange(1, 21)
+    timestamps = pd.date_range('2024-01-02', periods=len(close), freq='D')
+    return [
+        {
+            'timestamp': timestamp.isoformat(),
+            'open': float(price),
+            'high': float(price) + 1,
+            'low': float(price) - 1,
+            'close': float(price),
+            'volume': 1000
+        }
+        for timestamp, price in zip(timestamps, close)
+    ]
+
+
+def _assert_parity(spark, indicators):
+    records = _records()
+    service = SparkDataProcessingService(spark_session=spark)
+    # Force the Spark path for a batch this small
+    service.SPARK_THRESHOLD = 0
+
+    spark_result = service.process_batch_data('parity', records)
+    pandas_result = PandasDataProcessingService().process_batch_data('parity', records)
+
+    assert 'error' not in spark_result
+    for indicator in indicators:
+        expected = pandas_result[indicator]
+        actual = spark_result[indicator]
+        assert actual['timestamp'] == expected['timestamp'], indicator
+        for column in expected:
+            if column != 'timestamp':
+                assert actual[column] == pytest.approx(expected[column], rel=1e-9, abs=1e-9), (indicator, column)
+
+
+def test_window_indicators_match_pandas(spark):
+    _assert_parity(spark, WINDOW_INDICATORS)
+
+
+def test_ewm_indicators_match_pandas(spark):
+    _assert_parity(spark, EWM_INDICATORS)
+
+
+def test_ewm_columns_run_compiled_kernels_on_arrow_batches():
+    pytest.importorskip("numba")
+    assert indicator_kernels.NUMBA_AVAILABLE
+
+    close = np.array([float(record['close']) for record in _records()])
+    timestamps = pa.array(pd.date_range('2024-01-02', periods=len(close), freq='D'))
+    # Two record batches, as mapInArrow delivers them; pyarrow exposes them as read-only arrays
+    batches = [
+        pa.RecordBatch.from_arrays([timestamps[:40], pa.array(close[:40])], names=['timestamp', 'close']),
+        pa.RecordBatch.from_arrays([timestamps[40:], pa.array(close[40:])], names=['timestamp', 'close'])
+    ]
+
+    table = pa.Table.from_batches(list(_add_ewm_columns(iter(batches))))
+
+    for window in (5, 20):
+        expected = indicator_kernels._ema_pandas(close, window)
+        assert table.column(f'ema_{window}').to_pylist() == pytest.approx(expected.tolist(), rel=1e-9)
+    for name, expected in zip(('macd', 'signal', 'histogram'), indicator_kernels._macd_pandas(close, 12, 26, 9)):
+        assert table.column(name).to_pylist() == pytest.approx(expected.tolist(), rel=1e-9, abs=1e-9)